@@ -1,11 +1,32 @@
 from django.contrib import admin
+from django.utils.html import format_html
 from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+from .enums import AnalysisType, Status, labels_for
 from .models import UserProfile, AnalysisSession, MedicalData, SecurityLog, ParserSettings, Subscription
 
+# Singleton ParserSettings не удаляется через админку: после первого найденного exists() больше не проверяем
+_parser_settings_exists = False
+
+# Бейдж has_structured_data по типу анализа записи
+STRUCTURED_DATA_BADGES = {
+    AnalysisType.BLOOD_GENERAL: mark_safe('<span style="color: green;">✓ ОАК</span>'),
+    AnalysisType.BLOOD_BIOCHEM: mark_safe('<span style="color: green;">✓ Биохимия</span>'),
+    AnalysisType.HORMONES: mark_safe('<span style="color: green;">✓ Гормоны</span>'),
+}
+NO_STRUCTURED_DATA_BADGE = mark_safe('<span style="color: gray;">-</span>')
+
+STATUS_BADGE_COLORS = {"uploading": "#FFA500", "processing": "#1E90FF", "completed": "#28A745", "error": "#DC3545"}
+STATUS_BADGE_DEFAULT_COLOR = "#6C757D"
+STATUS_BADGE_TEMPLATE = (
+    '<span style="background-color: {}; color: white; padding: 3px 10px; border-radius: 3px;">{}</span>'
+)
+
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ("user", "subscription_type", "upload_limit", "used_uploads", "created_at" )
+    list_select_related = ("user",)
     list_filter = ("subscription_type", "created_at")
     readonly_fields = ("upload_limit", "used_uploads", "created_at")
 
@@ -18,6 +39,7 @@ class SubscriptionAdmin(admin.ModelAdmin):
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ("user", "language_preference", "created_at", "updated_at")
+    list_select_related = ("user",)
     list_filter = ("language_preference", "created_at")
     search_fields = ("user__username", "user__email")
     readonly_fields = ("encryption_key", "created_at", "updated_at")
@@ -40,6 +62,7 @@ class AnalysisSessionAdmin(admin.ModelAdmin):
         "upload_timestamp",
         "processing_time",
     )
+    list_select_related = ("user",)
     list_filter = ("processing_status", "analysis_type", "upload_timestamp")
     search_fields = ("user__username", "original_filename", "id")
     readonly_fields = ("upload_timestamp", "processing_started", "processing_completed", "file_deleted_timestamp")
@@ -52,10 +75,9 @@ class AnalysisSessionAdmin(admin.ModelAdmin):
     )
 
     def status_badge(self, obj):
-        colors = {"uploading": "#FFA500", "processing": "#1E90FF", "completed": "#28A745", "error": "#DC3545"}
-        color = colors.get(obj.processing_status, "#6C757D")
-        html = f'<span style="background-color: {color}; color: white; padding: 3px 10px; border-radius: 3px;">{obj.get_processing_status_display()}</span>'
-        return mark_safe(html)
+        color = STATUS_BADGE_COLORS.get(obj.processing_status, STATUS_BADGE_DEFAULT_COLOR)
+        label = labels_for(Status, get_language()).get(obj.processing_status, obj.processing_status)
+        return format_html(STATUS_BADGE_TEMPLATE, color, label)
 
     status_badge.short_description = "Статус"
 
@@ -71,6 +93,7 @@ class AnalysisSessionAdmin(admin.ModelAdmin):
 @admin.register(MedicalData)
 class MedicalDataAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "analysis_type", "analysis_date", "created_at", "has_structured_data")
+    list_select_related = ("user", "session")
     list_filter = ("analysis_type", "analysis_date", "created_at")
     search_fields = ("user__username", "session__id")
     readonly_fields = ("created_at", "encrypted_results")
@@ -82,17 +105,7 @@ class MedicalDataAdmin(admin.ModelAdmin):
     )
 
     def has_structured_data(self, obj):
-        has_general = hasattr(obj, "blood_general")
-        has_biochem = hasattr(obj, "blood_biochem")
-        has_hormones = hasattr(obj, "hormones")
-
-        if has_general:
-            return mark_safe('<span style="color: green;">✓ ОАК</span>')
-        elif has_biochem:
-            return mark_safe('<span style="color: green;">✓ Биохимия</span>')
-        elif has_hormones:
-            return mark_safe('<span style="color: green;">✓ Гормоны</span>')
-        return mark_safe('<span style="color: gray;">-</span>')
+        return STRUCTURED_DATA_BADGES.get(obj.analysis_type, NO_STRUCTURED_DATA_BADGE)
 
     has_structured_data.short_description = "Структурированные данные"
 
@@ -100,6 +113,7 @@ class MedicalDataAdmin(admin.ModelAdmin):
 @admin.register(SecurityLog)
 class SecurityLogAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "action", "ip_address", "timestamp")
+    list_select_related = ("user",)
     list_filter = ("action", "timestamp")
     search_fields = ("user__username", "action", "ip_address", "details")
     readonly_fields = ("user", "action", "details", "ip_address", "timestamp")
@@ -141,7 +155,10 @@ class ParserSettingsAdmin(admin.ModelAdmin):
 
     def has_add_permission(self, request):
         # Запретить создание новых записей (singleton)
-        return not ParserSettings.objects.exists()
+        global _parser_settings_exists
+        if not _parser_settings_exists:
+            _parser_settings_exists = ParserSettings.objects.exists()
+        return not _parser_settings_exists
 
     def has_delete_permission(self, request, obj=None):
         # Запретить удаление
@@ -1,6 +1,7 @@
 from rest_framework import status, viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.parsers import MultiPartParser, FormParser
 import logging
 from medical_analysis.models import AnalysisSession, MedicalData, UserProfile, SecurityLog
@@ -12,11 +13,25 @@ from medical_analysis.serializers import (
     MedicalDataSerializer,
 )
 from medical_analysis.utils.core import get_client_ip
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 from django.utils.translation import gettext as _
 logger = logging.getLogger(__name__)
 security_logger = logging.getLogger("security")
 
 
+class MedicalDataPagination(LimitOffsetPagination):
+    """?limit= не больше max_limit записей на страницу"""
+
+    max_limit = 200
+
+
+class MedicalDataFeedPagination(MedicalDataPagination):
+    """timeline/by_type всегда постраничны: без ?limit= отдаётся default_limit записей и ссылка next"""
+
+    default_limit = 50
+
+
 class UserProfileViewSet(viewsets.ModelViewSet):
     """API для управления профилем пользователя"""
 
@@ -27,8 +42,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         return UserProfile.objects.filter(user=self.request.user)
 
     def get_object(self):
-        profile, created = UserProfile.objects.get_or_create(user=self.request.user)
-        return profile
+        return UserProfile.for_user(self.request.user)
 
     @action(detail=False, methods=["get"])
     def me(self, request):
@@ -81,7 +95,7 @@ class FileUploadViewSet(viewsets.ViewSet):
             uploaded_file = serializer.validated_data["file"]
 
             # Проверяем, есть ли профиль пользователя
-            profile, created = UserProfile.objects.get_or_create(user=request.user)
+            UserProfile.for_user(request.user)
 
             # Обрабатываем загрузку
             upload_handler = FileUploadHandler()
@@ -151,7 +165,7 @@ class AnalysisSessionViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return AnalysisSession.objects.filter(user=self.request.user)
+        return AnalysisSession.objects.filter(user=self.request.user).select_related("user")
 
     @action(detail=True, methods=["get"])
     def results(self, request, pk=None):
@@ -167,7 +181,8 @@ class AnalysisSessionViewSet(viewsets.ReadOnlyModelViewSet):
 
             try:
                 medical_data = session.medical_data
-                decrypted_data = medical_data.decrypt_data()
+                # Сырой текст расшифровываем только для персонала
+                decrypted_data = medical_data.decrypt_data(include_raw=request.user.is_staff)
 
                 if decrypted_data is None:
                     return Response(
@@ -209,18 +224,34 @@ class MedicalDataViewSet(viewsets.ReadOnlyModelViewSet):
 
     serializer_class = MedicalDataSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MedicalDataPagination
+    # Колонки, нужные timeline/by_type: остальное не загружаем
+    decrypt_fields = ("id", "analysis_type", "analysis_date", "session", "encrypted_results")
 
     def get_queryset(self):
-        return MedicalData.objects.filter(user=self.request.user)
+        queryset = MedicalData.objects.filter(user=self.request.user).select_related("session")
+        if self.action in ("list", "retrieve"):
+            # Сериализатор выводит user и расшифровывает каждую запись ключом из user.profile
+            queryset = queryset.select_related("user__profile").defer("encrypted_raw_text")
+        return queryset
 
     @action(detail=False, methods=["get"])
     def timeline(self, request):
         """Получить временную линию всех анализов"""
-        medical_data = self.get_queryset().order_by("-analysis_date")
+        medical_data = (
+            self.get_queryset()
+            .select_related(None)
+            .only(*self.decrypt_fields)
+            .order_by("-analysis_date")
+        )
+        cipher = UserProfile.for_user(request.user).get_fernet_cipher()
+
+        paginator = MedicalDataFeedPagination()
+        page = paginator.paginate_queryset(medical_data, request, view=self)
 
         timeline = []
-        for data in medical_data:
-            decrypted = data.decrypt_data()
+        for data in page:
+            decrypted = data.decrypt_data(cipher=cipher, include_raw=False)
             if decrypted:
                 timeline.append(
                     {
@@ -228,11 +259,11 @@ class MedicalDataViewSet(viewsets.ReadOnlyModelViewSet):
                         "date": data.analysis_date,
                         "type": data.analysis_type,
                         "parsed_data": decrypted.get("parsed_data", {}),
-                        "session_id": data.session.id,
+                        "session_id": data.session_id,
                     }
                 )
 
-        return Response({"count": len(timeline), "results": timeline})
+        return paginator.get_paginated_response(timeline)
 
     @action(detail=False, methods=["get"])
     def by_type(self, request):
@@ -242,22 +273,34 @@ class MedicalDataViewSet(viewsets.ReadOnlyModelViewSet):
         if not analysis_type:
             return Response({"error": _("Не указан тип анализа")}, status=status.HTTP_400_BAD_REQUEST)
 
-        medical_data = self.get_queryset().filter(analysis_type=analysis_type).order_by("-analysis_date")
+        medical_data = (
+            self.get_queryset()
+            .select_related(None)
+            .only(*self.decrypt_fields)
+            .filter(analysis_type=analysis_type)
+            .order_by("-analysis_date")
+        )
+        cipher = UserProfile.for_user(request.user).get_fernet_cipher()
+
+        paginator = MedicalDataFeedPagination()
+        page = paginator.paginate_queryset(medical_data, request, view=self)
 
         results = []
-        for data in medical_data:
-            decrypted = data.decrypt_data()
+        for data in page:
+            decrypted = data.decrypt_data(cipher=cipher, include_raw=False)
             if decrypted:
                 results.append(
                     {
                         "id": data.pk,
                         "date": data.analysis_date,
                         "parsed_data": decrypted.get("parsed_data", {}),
-                        "session_id": data.session.id,
+                        "session_id": data.session_id,
                     }
                 )
 
-        return Response({"type": analysis_type, "count": len(results), "results": results})
+        response = paginator.get_paginated_response(results)
+        response.data["type"] = analysis_type
+        return response
 
     @action(detail=False, methods=["get"])
     def compare(self, request):
@@ -269,11 +312,16 @@ class MedicalDataViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({"error": _("Не указаны ID анализов для сравнения")}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            data1 = self.get_queryset().get(id=id1)
-            data2 = self.get_queryset().get(id=id2)
+            # Обе записи одним запросом
+            pk1, pk2 = int(id1), int(id2)
+            found = self.get_queryset().select_related(None).only(*self.decrypt_fields).in_bulk([pk1, pk2])
+            if pk1 not in found or pk2 not in found:
+                raise MedicalData.DoesNotExist
+            data1, data2 = found[pk1], found[pk2]
 
-            decrypted1 = data1.decrypt_data()
-            decrypted2 = data2.decrypt_data()
+            cipher = UserProfile.for_user(request.user).get_fernet_cipher()
+            decrypted1 = data1.decrypt_data(cipher=cipher, include_raw=False)
+            decrypted2 = data2.decrypt_data(cipher=cipher, include_raw=False)
 
             if not decrypted1 or not decrypted2:
                 return Response({"error": _("Ошибка расшифровки данных")}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -298,28 +346,32 @@ class MedicalDataViewSet(viewsets.ReadOnlyModelViewSet):
 
             return Response(comparison)
 
-        except MedicalData.DoesNotExist:
+        except (MedicalData.DoesNotExist, ValueError):
             return Response({"error": _("Один из анализов не найден")}, status=status.HTTP_404_NOT_FOUND)
 
     def _calculate_differences(self, data1, data2):
         """Вычислить разности между показателями"""
         differences = {}
 
-        for key in set(data1.keys()) | set(data2.keys()):
-            val1 = data1.get(key)
-            val2 = data2.get(key)
+        # Сравнивать имеет смысл только показатели, присутствующие в обоих анализах
+        for key in data1.keys() & data2.keys():
+            val1 = data1[key]
+            val2 = data2[key]
 
-            if val1 is not None and val2 is not None:
-                try:
-                    diff = float(val2) - float(val1)
-                    percent_change = (diff / float(val1)) * 100 if val1 != 0 else 0
-                    differences[key] = {
-                        "absolute_change": diff,
-                        "percent_change": round(percent_change, 2),
-                        "trend": "up" if diff > 0 else "down" if diff < 0 else "stable",
-                    }
-                except (ValueError, TypeError):
-                    differences[key] = {"note": _("Невозможно сравнить значения")}
+            if val1 is None or val2 is None:
+                continue
+            try:
+                num1, num2 = float(val1), float(val2)
+            except (ValueError, TypeError):
+                differences[key] = {"note": _("Невозможно сравнить значения")}
+                continue
+            diff = num2 - num1
+            percent_change = (diff / num1) * 100 if num1 != 0 else 0
+            differences[key] = {
+                "absolute_change": diff,
+                "percent_change": round(percent_change, 2),
+                "trend": "up" if diff > 0 else "down" if diff < 0 else "stable",
+            }
 
         return differences
 
@@ -328,10 +380,54 @@ class SecurityLogViewSet(viewsets.ReadOnlyModelViewSet):
     """API для просмотра логов безопасности (только для администраторов)"""
 
     permission_classes = [permissions.IsAdminUser]
+    activity_page_size = 100
+    activity_max_page_size = 500
 
     def get_queryset(self):
         return SecurityLog.objects.all()
 
+    def _user_activity_keyset(self, request, user_id, logs):
+        """Keyset-пагинация активности по (timestamp, id)
+
+        Логи только дописываются, поэтому курсор из последней записи страницы
+        даёт стабильные страницы без OFFSET на любой глубине. Курсор отдаётся
+        строкой ISO 8601 и передаётся обратно как есть в ?before_ts=&before_id=
+        """
+        try:
+            page_size = int(request.query_params.get("page_size", self.activity_page_size))
+        except ValueError:
+            return Response({"error": _("Некорректный page_size")}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = max(1, min(page_size, self.activity_max_page_size))
+
+        before_ts = request.query_params.get("before_ts")
+        if before_ts:
+            before = parse_datetime(before_ts)
+            if before is None:
+                return Response({"error": _("Некорректный before_ts")}, status=status.HTTP_400_BAD_REQUEST)
+
+            before_id = request.query_params.get("before_id")
+            if before_id:
+                try:
+                    before_id = int(before_id)
+                except ValueError:
+                    return Response({"error": _("Некорректный before_id")}, status=status.HTTP_400_BAD_REQUEST)
+                logs = logs.filter(Q(timestamp__lt=before) | Q(timestamp=before, id__lt=before_id))
+            else:
+                logs = logs.filter(timestamp__lt=before)
+
+        activities = list(
+            logs.order_by("-timestamp", "-id").values("id", "timestamp", "action", "details", "ip_address")[:page_size]
+        )
+
+        next_cursor = None
+        if len(activities) == page_size:
+            last = activities[-1]
+            next_cursor = {"before_ts": last["timestamp"].isoformat(), "before_id": last["id"]}
+
+        return Response(
+            {"user_id": user_id, "activity_count": len(activities), "activities": activities, "next": next_cursor}
+        )
+
     @action(detail=False, methods=["get"])
     def user_activity(self, request):
         """Получить активность конкретного пользователя"""
@@ -340,12 +436,5 @@ class SecurityLogViewSet(viewsets.ReadOnlyModelViewSet):
         if not user_id:
             return Response({"error": _("Не указан user_id")}, status=status.HTTP_400_BAD_REQUEST)
 
-        logs = SecurityLog.objects.filter(user_id=user_id).order_by("-timestamp")
-
-        activities = []
-        for log in logs:
-            activities.append(
-                {"timestamp": log.timestamp, "action": log.action, "details": log.details, "ip_address": log.ip_address}
-            )
-
-        return Response({"user_id": user_id, "activity_count": len(activities), "activities": activities})
+        # Всегда постранично: ?page_size= и курсор ?before_ts=&before_id= из поля next
+        return self._user_activity_keyset(request, user_id, SecurityLog.objects.filter(user_id=user_id))
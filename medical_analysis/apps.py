@@ -1,24 +1,33 @@
 import logging
-import sys
 
 from django.apps import AppConfig
+
 logger = logging.getLogger(__name__)
 
+
+def _warmup_ocr(**kwargs):
+    """Загрузка моделей OCR в дочернем процессе Celery (сигнал worker_process_init)
+
+    Выполняется синхронно уже после fork: родитель не держит потоков и блокировок
+    torch, а каждый воркер загружает модель один раз до первой задачи
+    """
+    try:
+        logger.info("warming up OCR engine...")
+        from medical_analysis.ocr_service import get_ocr_service
+        get_ocr_service().ocr_engine.load()
+        logger.info("OCR engine ready")
+    except Exception as e:
+        logger.warning(f"OCR warm-up failed: {e}")
+
+
 class MedicalAnalysisConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "medical_analysis"
 
     def ready(self):
-        """initialize OCR engine on startup"""
+        """Подключение сигналов; OCR прогревается только в процессах воркеров Celery"""
         import medical_analysis.signals
+        from celery.signals import worker_process_init
 
-        if any(cmd in sys.argv for cmd in ['migrate', 'makemigrations']):
-            return
-
-        try:
-            logger.info("warming up OCR engine...")
-            from medical_analysis.ocr_service import get_ocr_service
-            get_ocr_service()
-            logger.info("OCR engine ready")
-        except Exception as e:
-            logger.warning(f"OCR warm-up failed: {e}")
+        # Веб-процессам OCR не нужен; в воркерах прогрев идёт после fork, в каждом дочернем процессе
+        worker_process_init.connect(_warmup_ocr, weak=False, dispatch_uid="medical_analysis_ocr_warmup")
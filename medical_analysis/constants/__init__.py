@@ -3,9 +3,15 @@
 """
 
 from .parameters import (
+    ParamSpec,
+    ParamInfo,
     PARAMETERS,
     PARAMETER_NAMES_RU,
     PARAMETER_TYPE_MAP,
+    PARAMS_BY_TYPE,
+    BLOOD_GENERAL_PARAMS,
+    BLOOD_BIOCHEM_PARAMS,
+    HORMONE_PARAMS,
     RANGES_PARSER,
     BLOOD_PARSER,
     BIOCHEM_PARSER,
@@ -15,7 +21,8 @@ from .parameters import (
     get_parameter_info,
     get_reference_range,
     validate_value,
-    get_display_name
+    get_display_name,
+    match_lines,
 )
 
 from .parsing import (
@@ -27,6 +34,8 @@ from .parsing import (
 
 from .units import (
     UNITS_DICT,
+    UNITS_EN,
+    UNITS_RU,
     UNIT_ALIASES,
     normalize_unit,
 )
@@ -39,9 +48,15 @@ from .prompts import (
 
 __all__ = [
     # Параметры
+    "ParamSpec",
+    "ParamInfo",
     "PARAMETERS",
     "PARAMETER_NAMES_RU",
     "PARAMETER_TYPE_MAP",
+    "PARAMS_BY_TYPE",
+    "BLOOD_GENERAL_PARAMS",
+    "BLOOD_BIOCHEM_PARAMS",
+    "HORMONE_PARAMS",
     "RANGES_PARSER",
     "BLOOD_PARSER",
     "BIOCHEM_PARSER",
@@ -52,6 +67,7 @@ __all__ = [
     "get_reference_range",
     "validate_value",
     "get_display_name",
+    "match_lines",
     # Парсинг
     "ANALYSIS_KEYWORDS",
     "UNIT_PATTERNS",
@@ -59,6 +75,8 @@ __all__ = [
     "REFERENCE_PATTERNS",
     # Единицы
     "UNITS_DICT",
+    "UNITS_EN",
+    "UNITS_RU",
     "UNIT_ALIASES",
     "normalize_unit",
     # Промпты
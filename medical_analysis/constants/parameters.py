@@ -3,6 +3,43 @@
 Все данные о параметрах в одном месте
 """
 
+import re
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import cache, lru_cache
+from types import MappingProxyType
+from typing import NamedTuple
+
+
+@dataclass(slots=True, frozen=True)
+class ParamSpec:
+    """Описание параметра (значение PARAMETERS после заморозки)"""
+
+    name_key: str
+    names_ru: tuple[str, ...]
+    aliases: tuple[str, ...]
+    type: str
+    units: tuple[str, ...]
+    reference: tuple | dict[str, tuple]
+    range: tuple
+    keywords: tuple[str, ...]
+    display_suffix: str | None = None
+    # aliases в нижнем регистре - в этом виде они ключи всех производных словарей
+    aliases_lower: tuple[str, ...] = ()
+
+
+class ParamInfo(NamedTuple):
+    """Результат get_parameter_info"""
+
+    canonical_key: str
+    ru_name: str
+    type: str
+    units: tuple[str, ...]
+    reference: tuple | dict[str, tuple]
+    range: tuple
+
+
 PARAMETERS = {
     # ========== ОБЩИЙ АНАЛИЗ КРОВИ ==========
     # Абсолютные значения лейкоформулы
@@ -509,43 +546,117 @@ PARAMETERS = {
     },
 }
 
+# ========== ЗАМОРОЗКА ==========
+
+# Записи превращаются в ParamSpec. Списки превращаем в кортежи, а одинаковые
+# кортежи (диапазоны, наборы единиц) заменяем одним общим объектом.
+# Строки внутри списков (единицы, ключевые слова, названия) интернируются,
+# чтобы повторяющиеся "%", "ммоль/л" и т.п. хранились в одном экземпляре.
+# Ключевые слова и алиасы приводятся к нижнему регистру здесь же, один раз
+_intern = {}
+for param in PARAMETERS.values():
+    param["keywords"] = [keyword.lower() for keyword in param["keywords"]]
+    param["aliases_lower"] = [alias.lower() for alias in param["aliases"]]
+    for field, field_value in param.items():
+        if isinstance(field_value, list):
+            field_value = tuple(sys.intern(item) if isinstance(item, str) else item for item in field_value)
+        if isinstance(field_value, tuple):
+            param[field] = _intern.setdefault(field_value, field_value)
+        elif isinstance(field_value, dict):
+            for gender, gender_range in field_value.items():
+                field_value[gender] = _intern.setdefault(gender_range, gender_range)
+del _intern
+
+PARAMETERS = MappingProxyType({param_key: ParamSpec(**param) for param_key, param in PARAMETERS.items()})
+
 # ========== ГЕНЕРИРУЕМЫЕ СЛОВАРИ ==========
 
 # Русские названия для всех алиасов
 PARAMETER_NAMES_RU = {}
-for param_key, param in PARAMETERS.items():
-    base_name = param["names_ru"][0]
-    for alias in param["aliases"]:
-        PARAMETER_NAMES_RU[alias.lower()] = base_name
-
 # Словарь с display_suffix
 PARAMETER_DISPLAY_SUFFIXES = {}
-for param_key, param in PARAMETERS.items():
-    if "display_suffix" in param:
-        for alias in param["aliases"]:
-            PARAMETER_DISPLAY_SUFFIXES[alias.lower()] = param["display_suffix"]
-
 # Маппинг типов
 PARAMETER_TYPE_MAP = {}
+# Валидационные диапазоны
+RANGES_PARSER = {}
+# Алиас (в нижнем регистре) -> канонический ключ
+ALIAS_TO_KEY = {}
+# Алиас (в нижнем регистре) -> ParamInfo: информация за один поиск
+_ALIAS_TO_INFO: dict[str, ParamInfo] = {}
+# Референсы по алиасу в едином виде (мужской, женский, объединённый) - без
+# ветвления по типу. Для параметров, не зависящих от пола, все три диапазона совпадают
+_REFERENCE_BY_ALIAS: dict[str, tuple[tuple, tuple, tuple]] = {}
+# Индекс диапазона в _REFERENCE_BY_ALIAS; всё остальное - объединённый
+_GENDER_INDEX = {"male": 0, "female": 1}
+_COMBINED_INDEX = 2
+
+# Ключевые слова по типам анализов: тип -> {канонический ключ: keywords}
+_PARSERS_BY_TYPE = defaultdict(dict)
+
+# Все словари заполняются за один проход по PARAMETERS
 for param_key, param in PARAMETERS.items():
-    for alias in param["aliases"]:
-        PARAMETER_TYPE_MAP[alias.lower()] = param["type"]
+    base_name = param.names_ru[0]
+    param_type = param.type
+    param_range = param.range
+    display_suffix = param.display_suffix
+
+    param_info = ParamInfo(
+        canonical_key=param_key,
+        ru_name=base_name,
+        type=param_type,
+        units=param.units,
+        reference=param.reference,
+        range=param_range,
+    )
+
+    reference = param.reference
+    if type(reference) is dict:
+        male_range = reference.get("male", (0, 0))
+        female_range = reference.get("female", (0, 0))
+        combined_range = (min(male_range[0], female_range[0]), max(male_range[1], female_range[1]))
+        reference_by_gender = (male_range, female_range, combined_range)
+    else:
+        reference_by_gender = (reference, reference, reference)
 
-# Валидационные диапазоны
-RANGES_PARSER = {alias.lower(): param["range"] for param_key, param in PARAMETERS.items() for alias in param["aliases"]}
+    for alias_lower in param.aliases_lower:
+        PARAMETER_NAMES_RU[alias_lower] = base_name
+        PARAMETER_TYPE_MAP[alias_lower] = param_type
+        RANGES_PARSER[alias_lower] = param_range
+        ALIAS_TO_KEY[alias_lower] = param_key
+        _ALIAS_TO_INFO[alias_lower] = param_info
+        _REFERENCE_BY_ALIAS[alias_lower] = reference_by_gender
+        if display_suffix is not None:
+            PARAMETER_DISPLAY_SUFFIXES[alias_lower] = display_suffix
+
+    _PARSERS_BY_TYPE[param_type][param_key] = param.keywords
 
 # Парсеры по типам анализов
-BLOOD_PARSER = {}
-BIOCHEM_PARSER = {}
-HORMONES_PARSER = {}
+BLOOD_PARSER = _PARSERS_BY_TYPE["blood_general"]
+BIOCHEM_PARSER = _PARSERS_BY_TYPE["blood_biochem"]
+HORMONES_PARSER = _PARSERS_BY_TYPE["hormones"]
+
+# Алиасы (в нижнем регистре) каждого типа анализа - для проверок принадлежности
+PARAMS_BY_TYPE = MappingProxyType({
+    param_type: frozenset(alias for alias, alias_type in PARAMETER_TYPE_MAP.items() if alias_type == param_type)
+    for param_type in _PARSERS_BY_TYPE
+})
+BLOOD_GENERAL_PARAMS = PARAMS_BY_TYPE["blood_general"]
+BLOOD_BIOCHEM_PARAMS = PARAMS_BY_TYPE["blood_biochem"]
+HORMONE_PARAMS = PARAMS_BY_TYPE["hormones"]
+
+# Ключевое слово -> (канонический ключ, тип анализа)
+KEYWORD_INDEX = {
+    keyword: (param_key, param.type) for param_key, param in PARAMETERS.items() for keyword in param.keywords
+}
 
-for param_key, param in PARAMETERS.items():
-    if param["type"] == "blood_general":
-        BLOOD_PARSER[param_key] = param["keywords"]
-    elif param["type"] == "blood_biochem":
-        BIOCHEM_PARSER[param_key] = param["keywords"]
-    elif param["type"] == "hormones":
-        HORMONES_PARSER[param_key] = param["keywords"]
+# Все ключевые слова одним выражением: текст просматривается за один проход
+# вместо проверки каждого слова по отдельности. Длинные слова идут первыми,
+# чтобы "нейтрофилы абс" находилось раньше, чем "нейтрофилы".
+# Каждое слово - отдельная группа: по номеру сработавшей группы
+# (match.lastindex) сразу получаем параметр, без нормализации найденного текста.
+# Выражения (общее и по типам анализов) компилируются при первом поиске,
+# см. _keyword_scanner
+_KEYWORDS_BY_LENGTH = sorted(KEYWORD_INDEX, key=len, reverse=True)
 
 # Лейкоформула (параметры с %)
 BLOOD_LEUKO_PARAMS = [
@@ -591,56 +702,107 @@ GPT_PARSER_ALIASES = {
     "red_cell_distribution_width_sd": "rdw_sd",
 }
 
+# Значения указывают на те же (интернированные) строки, что и ключи PARAMETERS
+GPT_PARSER_ALIASES = {
+    sys.intern(alias): sys.intern(canonical_key) for alias, canonical_key in GPT_PARSER_ALIASES.items()
+}
+
+# Сгенерированные словари доступны только для чтения. Ключи уже интернированы:
+# алиасы - при построении, ключевые слова - при заморозке PARAMETERS
+PARAMETER_NAMES_RU = MappingProxyType(PARAMETER_NAMES_RU)
+PARAMETER_DISPLAY_SUFFIXES = MappingProxyType(PARAMETER_DISPLAY_SUFFIXES)
+PARAMETER_TYPE_MAP = MappingProxyType(PARAMETER_TYPE_MAP)
+RANGES_PARSER = MappingProxyType(RANGES_PARSER)
+ALIAS_TO_KEY = MappingProxyType(ALIAS_TO_KEY)
+BLOOD_PARSER = MappingProxyType(BLOOD_PARSER)
+BIOCHEM_PARSER = MappingProxyType(BIOCHEM_PARSER)
+HORMONES_PARSER = MappingProxyType(HORMONES_PARSER)
+KEYWORD_INDEX = MappingProxyType(KEYWORD_INDEX)
+GPT_PARSER_ALIASES = MappingProxyType(GPT_PARSER_ALIASES)
+
 
 # Вспомогательные функции
-def get_parameter_info(params_key: str) -> dict:
-    """Получить полную информацию о параметре"""
-    param_key_lower = params_key.lower()
+def _normalize_key(params_key: str) -> str:
+    """Привести ключ к виду индекса: для ASCII хватает lower(), casefold() - только для остального"""
+    return params_key.lower() if params_key.isascii() else params_key.casefold()
+
 
-    # Ищем в алиасах
-    for key, params in PARAMETERS.items():
-        if param_key_lower in [a.lower() for a in params["aliases"]]:
-            return {
-                "canonical_key": key,
-                "ru_name": params["names_ru"][0],
-                "type": params["type"],
-                "units": params["units"],
-                "reference": params["reference"],
-                "range": params["range"],
-            }
+@lru_cache(maxsize=256)
+def get_parameter_info(params_key: str) -> ParamInfo | None:
+    """Получить полную информацию о параметре
 
-    return None
+    Ключи индекса интернированы: вызывающий код, который многократно
+    передаёт один и тот же ключ, может пропустить его через sys.intern -
+    тогда сравнение при поиске сводится к проверке идентичности.
+    Повторные вызовы с тем же ключом отдаются из lru_cache
+    """
+    return _ALIAS_TO_INFO.get(_normalize_key(params_key))
 
 
+@lru_cache(maxsize=256)
 def get_reference_range(params_key: str, gender: str = None) -> tuple:
     """Получить референсный диапазон для параметра"""
-    info = get_parameter_info(params_key)
-    if not info:
+    if (reference_by_gender := _REFERENCE_BY_ALIAS.get(_normalize_key(params_key))) is None:
         return None
 
-    ref = info["reference"]
+    # Без пола (или с неизвестным) - объединённый диапазон
+    index = _GENDER_INDEX.get(gender.lower(), _COMBINED_INDEX) if gender else _COMBINED_INDEX
+    return reference_by_gender[index]
 
-    # Если референс зависит от пола
-    if isinstance(ref, dict):
-        if gender and gender.lower() in ref:
-            return ref[gender.lower()]
-        # Возвращаем средний диапазон
-        male_range = ref.get("male", (0, 0))
-        female_range = ref.get("female", (0, 0))
-        return (min(male_range[0], female_range[0]), max(male_range[1], female_range[1]))
 
-    return ref
+def validate_value(params_key: str, value: float) -> bool:
+    """Проверить, что значение в допустимом диапазоне (ключи см. get_parameter_info)"""
+    # Парсеры передают канонические ключи уже в нижнем регистре - lower() не нужен
+    if (value_range := RANGES_PARSER.get(params_key) or RANGES_PARSER.get(_normalize_key(params_key))) is None:
+        return True  # Если нет диапазона, считаем валидным
 
+    min_val, max_val = value_range
+    return min_val <= value <= max_val
 
-def validate_value(params_key: str, value: float) -> bool:
-    """Проверить, что значение в допустимом диапазоне"""
-    param_key_lower = params_key.lower()
 
-    if param_key_lower in RANGES_PARSER:
-        min_val, max_val = RANGES_PARSER[param_key_lower]
-        return min_val <= value <= max_val
+@cache
+def _keyword_scanner(analysis_type: str | None = None) -> tuple[re.Pattern, tuple]:
+    """Выражение по ключевым словам (всем или одного типа анализа)
+
+    Вместе с выражением - таблица номер группы -> (канонический ключ, тип).
+    Нужно только процессам, разбирающим текст
+    """
+    keywords = [
+        keyword
+        for keyword in _KEYWORDS_BY_LENGTH
+        if analysis_type is None or KEYWORD_INDEX[keyword][1] == analysis_type
+    ]
+    if not keywords:
+        # неизвестный тип - выражение, которое ничего не находит
+        return re.compile(r"(?!)"), (None,)
+
+    pattern = re.compile("|".join(f"({re.escape(keyword)})" for keyword in keywords), re.IGNORECASE)
+    return pattern, (None, *(KEYWORD_INDEX[keyword] for keyword in keywords))
+
+
+def match_lines(text: str, analysis_type: str | None = None) -> dict[int, str]:
+    """Самый конкретный параметр каждой строки текста за один просмотр
+
+    Ключевые слова пересекаются ("нейтрофилы" / "нейтрофилы абс"), поэтому в строке
+    побеждает самое длинное совпадение, а не параметр, проверенный первым.
+    Возвращает словарь номер строки -> канонический ключ в порядке строк;
+    строк без ключевых слов в нём нет
+    """
+    pattern, groups = _keyword_scanner(analysis_type)
+    found = {}
+    lengths = {}
+    line_no = 0
+    position = 0
+    for match in pattern.finditer(text):
+        start = match.start()
+        line_no += text.count("\n", position, start)
+        position = start
+        length = match.end() - start
+        if length > lengths.get(line_no, 0):
+            lengths[line_no] = length
+            found[line_no] = groups[match.lastindex][0]
+    return found
 
-    return True  # Если нет диапазона, считаем валидным
 
 def get_display_name(param_key: str, unit: str) -> str:
     """
@@ -673,18 +835,15 @@ def get_display_name(param_key: str, unit: str) -> str:
         param = PARAMETERS[param_key]
     else:
         # search through aliases
-        for key, p in PARAMETERS.items():
-            if param_key_lower in [a.lower() for a in p["aliases"]]:
-                canonical_key = key
-                param = p
-                break
+        canonical_key = ALIAS_TO_KEY.get(param_key_lower)
+        param = PARAMETERS.get(canonical_key)
 
     # if parameter not found - return formatted param_key
     if not param:
         return PARAMETER_NAMES_RU.get(param_key_lower, param_key.replace("_", " ").title())
 
-    base_name = param["names_ru"][0]
-    display_suffix = param.get("display_suffix", "")
+    base_name = param.names_ru[0]
+    display_suffix = param.display_suffix
 
     # if there is suffix AND unit matches
     if display_suffix and unit == display_suffix:
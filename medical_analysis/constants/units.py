@@ -1,5 +1,10 @@
 """Единицы измерения для медицинских параметров (EN/RU)"""
 
+import re
+import sys
+from functools import lru_cache
+from types import MappingProxyType
+
 UNITS_DICT = {
     # Концентрация в крови
     "mmol_l": {"en": "mmol/L", "ru": "ммоль/л"},
@@ -88,16 +93,49 @@ UNIT_ALIASES = {
     "pg": "pg",
 }
 
+# Таблицы неизменны: доступ только на чтение, строки интернированы
+UNITS_DICT = MappingProxyType({
+    sys.intern(unit_key): MappingProxyType({lang: sys.intern(label) for lang, label in unit.items()})
+    for unit_key, unit in UNITS_DICT.items()
+})
+# Плоские таблицы по языкам: ключ единицы -> обозначение (один поиск вместо двух)
+UNITS_EN = MappingProxyType({unit_key: unit["en"] for unit_key, unit in UNITS_DICT.items()})
+UNITS_RU = MappingProxyType({unit_key: unit["ru"] for unit_key, unit in UNITS_DICT.items()})
+UNIT_ALIASES = MappingProxyType({sys.intern(alias): sys.intern(unit_key) for alias, unit_key in UNIT_ALIASES.items()})
+# Стандартные русские обозначения: такие строки уже нормализованы
+_CANONICAL_RU = frozenset(UNITS_RU.values())
+
+
+# Пробельные символы внутри единицы (OCR даёт "ммоль / л", "10^9 /л")
+_WS_RE = re.compile(r"\s+")
+
 
+def _preclean(unit_str: str) -> str:
+    """Нижний регистр без пробелов; регулярное выражение - только если пробелы есть внутри"""
+    # Строку без пробелов по краям и уже в нижнем регистре (частый случай после OCR) не копируем
+    s = unit_str.strip() if (unit_str[:1].isspace() or unit_str[-1:].isspace()) else unit_str
+    unit_lower = s if s.islower() else s.lower()
+    if " " not in unit_lower and "\t" not in unit_lower:
+        return unit_lower
+    return _WS_RE.sub("", unit_lower)
+
+
+@lru_cache(maxsize=256)
 def normalize_unit(unit_str: str) -> str:
-    """Нормализация единицы измерения к стандартному виду"""
+    """Нормализация единицы измерения к стандартному виду (результаты кешируются - таблицы неизменны)"""
     if not unit_str:
         return ""
 
-    unit_lower = unit_str.lower().strip()
-    unit_key = UNIT_ALIASES.get(unit_lower)
+    if unit_str in _CANONICAL_RU:
+        return unit_str
+
+    # Алиасы хранятся уже в нижнем регистре и без пробелов по краям:
+    # нормализованный ввод находится сразу, без lower()/strip()
+    unit_key = UNIT_ALIASES.get(unit_str)
+    if unit_key is None:
+        unit_key = UNIT_ALIASES.get(_preclean(unit_str))
 
     if unit_key:
-        return UNITS_DICT[unit_key]["ru"]
+        return UNITS_RU[unit_key]
 
     return unit_str
@@ -5,14 +5,19 @@ context processors for adding data to all templates
 from django.conf import settings
 from django.utils import translation
 
+# settings are static for the process lifetime, read once instead of per render
+AVAILABLE_LANGUAGES = settings.LANGUAGES
+
 
 def language_context(request):
     """
     add current language code to template context
 
-    this allows templates to access LANGUAGE_CODE directly
+    this allows templates to access LANGUAGE_CODE directly;
+    LocaleMiddleware already stores the resolved language on the request,
+    otherwise the active language is read from translation
     """
     return {
-        "LANGUAGE_CODE": translation.get_language(),
-        "AVAILABLE_LANGUAGES": settings.LANGUAGES,
-    }
\ No newline at end of file
+        "LANGUAGE_CODE": getattr(request, "LANGUAGE_CODE", None) or translation.get_language(),
+        "AVAILABLE_LANGUAGES": AVAILABLE_LANGUAGES,
+    }
@@ -1,14 +1,35 @@
-from enum import Enum
-from django.utils.translation import gettext as _
-from django.db import models
+import sys
+from functools import cache
+from django.utils import translation
+from django.utils.translation import gettext_lazy as _
+from django.db.models.enums import TextChoices
 
 
-class LanguageChoices(models.TextChoices):
+class LabeledChoices(TextChoices):
+    """TextChoices с подписью по значению за один поиск в словаре"""
+
+    @classmethod
+    def label_for(cls, value: str):
+        """Подпись для значения (ленивая - переводится при выводе); неизвестное значение возвращается как есть"""
+        return cls._labels_by_value.get(value, value)
+
+    @classmethod
+    def get(cls, value: str):
+        """Элемент по значению или None - без исключения и перебора, в отличие от cls(value)"""
+        return cls._by_value.get(value)
+
+    @classmethod
+    def frozen_choices(cls) -> tuple:
+        """choices, собранные один раз (cls.choices строит новый список при каждом обращении)"""
+        return cls._choices_tuple
+
+
+class LanguageChoices(LabeledChoices):
     RU = "ru", "Русский"
     EN = "en", "English"
 
 
-class Status(models.TextChoices):
+class Status(LabeledChoices):
     UPLOADING = "uploading", _("Загрузка")
     PROCESSING = "processing", _("Обработка")
     OCR = "ocr", _("Распознавание текста")
@@ -17,14 +38,32 @@ class Status(models.TextChoices):
     ERROR = "error", _("Ошибка")
 
 
-class AnalysisType(models.TextChoices):
+class StatusValue:
+    """Значения Status обычными строками
+
+    Для сравнений в коде (опрос статуса, сигналы), где не нужна обёртка
+    перечисления. Status остаётся для полей моделей
+    """
+
+    UPLOADING = sys.intern("uploading")
+    PROCESSING = sys.intern("processing")
+    OCR = sys.intern("ocr")
+    PARSING = sys.intern("parsing")
+    COMPLETED = sys.intern("completed")
+    ERROR = sys.intern("error")
+
+    # Обработка завершена (успешно или с ошибкой)
+    FINISHED = frozenset({COMPLETED, ERROR})
+
+
+class AnalysisType(LabeledChoices):
     BLOOD_GENERAL = "blood_general", _("Общий анализ крови")
     BLOOD_BIOCHEM = "blood_biochem", _("Биохимический анализ")
     HORMONES = "hormones", _("Гормональные анализы")
     OTHER = "other", _("Другие анализы")
 
 
-class LaboratoryType(models.TextChoices):
+class LaboratoryType(LabeledChoices):
     INVITRO = "invitro", _("Инвитро")
     HELIX = "helix", _("Хеликс")
     KDL = "kdl", _("КДЛ")
@@ -33,10 +72,30 @@ class LaboratoryType(models.TextChoices):
     CITILAB = "citilab", _("Ситилаб")
     UNKNOWN = "unknown", _("Неизвестно")
 
-class GptModel(models.TextChoices):
+class GptModel(LabeledChoices):
     GPT_4O_MINI = "gpt-4o-mini", "GPT-4o Mini (быстрый, дешёвый)"
     GPT_4O = "gpt-4o", "GPT-4o (медленный, дорогой, точный)"
 
-class SubcriptionType(models.TextChoices):
+class SubcriptionType(LabeledChoices):
     TRIAL = "trial", _("триал")
-    PAID = "paid", _("оплачен")
\ No newline at end of file
+    PAID = "paid", _("оплачен")
+
+
+# Подписи остаются ленивыми: словарь строится один раз, а перевод
+# выполняется при выводе, на активном языке запроса
+for _choices in (LanguageChoices, Status, AnalysisType, LaboratoryType, GptModel, SubcriptionType):
+    _choices._labels_by_value = {member.value: member.label for member in _choices}
+    _choices._by_value = {member.value: member for member in _choices}
+    _choices._choices_tuple = tuple(_choices.choices)
+del _choices
+
+
+@cache
+def labels_for(choices_cls, language: str | None) -> dict[str, str]:
+    """Подписи перечисления на одном языке: значение -> переведённая строка
+
+    Словарь строится один раз на пару (перечисление, язык), поэтому вывод списков
+    не обращается к каталогу gettext на каждой строке. language=None - исходные подписи
+    """
+    with translation.override(language):
+        return {member.value: str(member.label) for member in choices_cls}
@@ -1,9 +1,11 @@
-import tempfile
 import logging
+import secrets
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime, timedelta
-import pytesseract
+from datetime import timedelta
 import fitz  # PyMuPDF
+import numpy as np
 import re
 from django.conf import settings
 from django.utils import timezone
@@ -11,12 +13,10 @@ from django.utils import timezone
 from .constants import (
     PARAMETER_TYPE_MAP,
     LABORATORY_SIGNATURES,
-    HORMONES_PARSER,
-    BLOOD_PARSER,
     BLOOD_LEUKO_PARAMS,
-    RANGES_PARSER,
-    BIOCHEM_PARSER,
     ANALYSIS_KEYWORDS,
+    validate_value,
+    match_lines,
 )
 from .enums import AnalysisType, Status, LaboratoryType
 from .gpt_parser import GPTMedicalParser, format_gpt_result
@@ -26,6 +26,72 @@ from celery import shared_task
 logger = logging.getLogger(__name__)
 security_logger = logging.getLogger("security")
 
+# Регулярные выражения парсера компилируются один раз при импорте модуля.
+# Первое число каждой строки (re.M): окно из нескольких строк под ключевым словом
+# разбирается одним finditer. Суффиксы "*" / "%" на group(1) не влияют, поэтому
+# одно выражение используется и для процентов, и для биохимии
+_LINE_NUMBER_RE = re.compile(r"^[^\d\n]*(\d+[.,]\d+|\d+)", re.MULTILINE)
+_REF_RE = re.compile(r"(\d+\.\d+ - \d+\.\d+|\d+\.\d+)")
+_RANGE_RE = re.compile(r"(\d+\.\d+)-(\d+\.\d+)")
+# Единицы измерения гормонов по параметру и общий поиск любой из них
+_HORMONE_UNIT_PATTERNS = {
+    key: re.compile(pattern)
+    for key, pattern in {
+        "tsh": r"мкме/мл|μiu/ml",
+        "free_t4": r"пмоль/л|pmol/l",
+        "free_t3": r"пмоль/л|pmol/l",
+        "testosterone": r"нмоль/л|nmol/l",
+        "estradiol": r"пг/мл|pg/ml",
+        "progesterone": r"нмоль/л|nmol/l",
+        "cortisol": r"нмоль/л|nmol/l",
+    }.items()
+}
+_HORMONE_COMMON_UNITS_RE = re.compile(r"(мкме/мл|пмоль/л|нмоль/л|пг/мл|μiu/ml|pmol/l|nmol/l|pg/ml)")
+
+# Символы, недопустимые в имени временного файла (разделители путей, спецсимволы)
+_UNSAFE_FILENAME_RE = re.compile(r"[^\w.-]")
+
+# Страница PDF с таким количеством символов текстового слоя не отправляется в OCR
+MIN_PAGE_TEXT_LENGTH = 50
+# Разрешение рендера страниц для OCR: по умолчанию PyMuPDF даёт 72 DPI в RGB,
+# и предобработка растягивает такую картинку до 300 DPI интерполяцией
+OCR_RENDER_DPI = 300
+
+# Шаблоны параметров ОАК и биохимии
+_BLOOD_GENERAL_PATTERNS = {
+    "hemoglobin": [
+        r"гемоглобин.*?(\d+[\.,]\d+|\d+)",
+        r"hb.*?(\d+[\.,]\d+|\d+)",
+        r"hemoglobin.*?(\d+[\.,]\d+|\d+)",
+    ],
+    "erythrocytes": [r"эритроциты.*?(\d+[\.,]\d+)", r"rbc.*?(\d+[\.,]\d+)", r"red blood cells.*?(\d+[\.,]\d+)"],
+    "leukocytes": [r"лейкоциты.*?(\d+[\.,]\d+)", r"wbc.*?(\d+[\.,]\d+)", r"white blood cells.*?(\d+[\.,]\d+)"],
+    "platelets": [r"тромбоциты.*?(\d+)", r"plt.*?(\d+)", r"platelets.*?(\d+)"],
+    "esr": [r"соэ.*?(\d+)", r"esr.*?(\d+)", r"sed rate.*?(\d+)"],
+}
+
+_BIOCHEM_PATTERNS = {
+    "glucose": [r"глюкоза.*?(\d+[\.,]\d+)", r"glucose.*?(\d+[\.,]\d+)"],
+    "total_protein": [r"общий белок.*?(\d+[\.,]?\d*)", r"total protein.*?(\d+[\.,]?\d*)"],
+    "creatinine": [r"креатинин.*?(\d+[\.,]?\d*)", r"creatinine.*?(\d+[\.,]?\d*)"],
+    "urea": [r"мочевина.*?(\d+[\.,]?\d*)", r"urea.*?(\d+[\.,]?\d*)"],
+}
+
+# Единицы измерения биохимии по параметру
+_UNIT_PATTERNS = {
+    key: re.compile(pattern)
+    for key, pattern in {
+        "glucose": r"ммоль/л",
+        "urea": r"ммоль/л",
+        "creatinine": r"мкмоль/л",
+        "bilirubin_total": r"мкмоль/л",
+        "alt": r"ед/л",
+        "ast": r"ед/л",
+        "atherogenic_index": r"< \d+\.\d+",  # Для индекса атерогенности
+        "gfr_ckd_epi": r"мл/мин/1,73м\^2",
+    }.items()
+}
+
 
 class SecureFileProcessor:
     """Безопасный процессор файлов с автоудалением"""
@@ -37,24 +103,31 @@ class SecureFileProcessor:
     def save_temp_file(self, uploaded_file, session: AnalysisSession) -> str:
         """Сохранить файл во временную папку"""
         try:
-            # Генерируем безопасное имя файла
-            timestamp = int(datetime.now().timestamp())
-            safe_filename = f"{session.pk}_{timestamp}_{uploaded_file.name}"
+            # Генерируем безопасное имя файла: случайный токен вместо времени (две загрузки
+            # в одну секунду не перезапишут друг друга), имя пользователя - без пути и спецсимволов
+            original_name = _UNSAFE_FILENAME_RE.sub("_", Path(uploaded_file.name).name)
+            safe_filename = f"{session.pk}_{secrets.token_hex(8)}_{original_name}"
             temp_path = self.temp_dir / safe_filename
 
             # Сохраняем файл
-            with Path.open(temp_path, "wb") as temp_file:
-                for chunk in uploaded_file.chunks():
-                    temp_file.write(chunk)
+            if hasattr(uploaded_file, "temporary_file_path"):
+                # Крупный файл Django уже записал на диск: копирование средствами ОС, без чтения в Python
+                shutil.copyfile(uploaded_file.temporary_file_path(), temp_path)
+            else:
+                uploaded_file.seek(0)
+                with Path.open(temp_path, "wb") as temp_file:
+                    shutil.copyfileobj(uploaded_file, temp_file, length=settings.UPLOAD_COPY_BUFFER_SIZE)
 
             # Обновляем сессию
             session.temp_file_path = str(temp_path)
             session.processing_status = "processing"
             session.processing_started = timezone.now()
-            session.save()
+            session.save(update_fields=["temp_file_path", "processing_status", "processing_started"])
 
             # Планируем автоудаление
-            schedule_file_deletion.s(str(temp_path), session.pk).apply_async()
+            schedule_file_deletion.apply_async(
+                args=[str(temp_path), session.pk], countdown=settings.FILE_RETENTION_SECONDS
+            )
 
             security_logger.info(f"Файл сохранен: {safe_filename}, пользователь: {session.user.username}")
             return str(temp_path)
@@ -63,7 +136,7 @@ class SecureFileProcessor:
             logger.error(f"Ошибка сохранения файла: {e}")
             session.processing_status = "error"
             session.error_message = f"Ошибка сохранения файла: {e}"
-            session.save()
+            session.save(update_fields=["processing_status", "error_message"])
             raise
 
 
@@ -72,44 +145,60 @@ class OCRProcessor:
 
     def __init__(self):
         from medical_analysis.ocr_service import get_ocr_service
+        # Общий на процесс экземпляр: модели EasyOCR загружаются один раз
+        # (при старте воркера, см. apps.py) и остаются в памяти между вызовами
         self.ocr_service = get_ocr_service()
 
-        # tesseract для PDF fallback
-        if hasattr(settings, "TESSERACT_CMD"):
-            pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
-
     def extract_text_from_pdf(self, file_path: str) -> str:
         """Извлечение текста из PDF"""
         try:
-            text = ""
-            doc = fitz.open(file_path)  # type: ignore[attr-defined]
-
-            for page_num in range(doc.page_count):
-                page = doc[page_num]
-                text += page.get_text()
+            with fitz.open(file_path) as doc:  # type: ignore[attr-defined]
+                page_texts = [page.get_text() for page in doc]
+
+                # OCR нужен страницам, где текста мало
+                # (проверяется текст самой страницы, а не накопленный по документу)
+                ocr_page_nums = [
+                    page_num for page_num, page_text in enumerate(page_texts)
+                    if len(page_text.strip()) < MIN_PAGE_TEXT_LENGTH
+                ]
+                if not ocr_page_nums:
+                    return "".join(page_texts)
+
+                # Страницы рендерятся и распознаются пачками по OCR_CONCURRENCY: в памяти
+                # одновременно не больше одной пачки изображений, а не весь документ
+                batch_size = max(1, settings.OCR_CONCURRENCY)
+                with ThreadPoolExecutor(max_workers=batch_size, thread_name_prefix="ocr-preprocess") as pool:
+                    for start in range(0, len(ocr_page_nums), batch_size):
+                        batch = ocr_page_nums[start:start + batch_size]
+                        images = [self._render_page(doc[page_num]) for page_num in batch]
+                        for page_num, ocr_text in zip(batch, self._ocr_pages(images, pool), strict=True):
+                            page_texts[page_num] += ocr_text
+
+            logger.info(f"OCR {len(ocr_page_nums)} страниц PDF")
+            return "".join(page_texts)
 
-                # Если текста мало, пробуем OCR на изображении страницы
-                if len(text.strip()) < 100:
-                    pix = page.get_pixmap()
-                    img_data = pix.tobytes("png")
+        except Exception as e:
+            logger.error(f"Ошибка извлечения текста из PDF: {e}")
+            raise
 
-                    # Сохраняем во временный файл для OCR
-                    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp_img:
-                        temp_img.write(img_data)
-                        temp_img_path = temp_img.name
+    @staticmethod
+    def _render_page(page) -> np.ndarray:
+        """Рендер страницы для OCR
 
-                    try:
-                        ocr_text = self.extract_text_from_image(temp_img_path)
-                        text += ocr_text
-                    finally:
-                        Path(temp_img_path).unlink(missing_ok=True)
+        Пиксели пиксмапа сразу становятся массивом, без PNG-кодирования и временных файлов
+        """
+        pix = page.get_pixmap(dpi=OCR_RENDER_DPI, colorspace=fitz.csGRAY, alpha=False)
+        return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
 
-            doc.close()
-            return text
+    def _ocr_pages(self, images: list[np.ndarray], pool: ThreadPoolExecutor) -> list[str]:
+        """OCR пачки страниц
 
-        except Exception as e:
-            logger.error(f"Ошибка извлечения текста из PDF: {e}")
-            raise
+        Предобработка (OpenCV, без GIL) идёт параллельно в пуле потоков, распознавание -
+        последовательно в порядке страниц, на общем экземпляре EasyOCR, который сам
+        использует все ядра
+        """
+        processed = pool.map(self.ocr_service.preprocessor.process_array, images)
+        return [self.ocr_service.extract_text_from_array(image) for image in processed]
 
     def extract_text_from_image(self, file_path: str) -> str:
         """извлечение текста из изображения используя EasyOCR"""
@@ -138,47 +227,23 @@ class OCRProcessor:
 class MedicalDataParser:
     """Парсер для извлечения структурированных данных из текста анализов"""
 
-    def __init__(self):
-        self.blood_general_patterns = {
-            "hemoglobin": [
-                r"гемоглобин.*?(\d+[\.,]\d+|\d+)",
-                r"hb.*?(\d+[\.,]\d+|\d+)",
-                r"hemoglobin.*?(\d+[\.,]\d+|\d+)",
-            ],
-            "erythrocytes": [r"эритроциты.*?(\d+[\.,]\d+)", r"rbc.*?(\d+[\.,]\d+)", r"red blood cells.*?(\d+[\.,]\d+)"],
-            "leukocytes": [r"лейкоциты.*?(\d+[\.,]\d+)", r"wbc.*?(\d+[\.,]\d+)", r"white blood cells.*?(\d+[\.,]\d+)"],
-            "platelets": [r"тромбоциты.*?(\d+)", r"plt.*?(\d+)", r"platelets.*?(\d+)"],
-            "esr": [r"соэ.*?(\d+)", r"esr.*?(\d+)", r"sed rate.*?(\d+)"],
-        }
-
-        self.biochem_patterns = {
-            "glucose": [r"глюкоза.*?(\d+[\.,]\d+)", r"glucose.*?(\d+[\.,]\d+)"],
-            "total_protein": [r"общий белок.*?(\d+[\.,]?\d*)", r"total protein.*?(\d+[\.,]?\d*)"],
-            "creatinine": [r"креатинин.*?(\d+[\.,]?\d*)", r"creatinine.*?(\d+[\.,]?\d*)"],
-            "urea": [r"мочевина.*?(\d+[\.,]?\d*)", r"urea.*?(\d+[\.,]?\d*)"],
-        }
+    # Справочные шаблоны (выводятся командой test_parser); общие для всех экземпляров,
+    # парсер состояния не хранит
+    blood_general_patterns = _BLOOD_GENERAL_PATTERNS
+    biochem_patterns = _BIOCHEM_PATTERNS
 
     def _get_hormone_unit(self, param_key: str, lines: list[str]) -> str:
-        """извлечение единицы измерения для гормонов"""
-        unit_patterns = {
-            "tsh": r"мкме/мл|μiu/ml",
-            "free_t4": r"пмоль/л|pmol/l",
-            "free_t3": r"пмоль/л|pmol/l",
-            "testosterone": r"нмоль/л|nmol/l",
-            "estradiol": r"пг/мл|pg/ml",
-            "progesterone": r"нмоль/л|nmol/l",
-            "cortisol": r"нмоль/л|nmol/l",
-        }
+        """извлечение единицы измерения для гормонов (строки уже в нижнем регистре)"""
+        pattern = _HORMONE_UNIT_PATTERNS.get(param_key)
 
-        for line in lines:
-            line_lower = line.lower()
-            if param_key in unit_patterns:
-                match = re.search(unit_patterns[param_key], line_lower)
+        for line_lower in lines:
+            if pattern is not None:
+                match = pattern.search(line_lower)
                 if match:
                     return match.group(0)
 
             # общий поиск единиц измерения
-            common_units = re.search(r"(мкме/мл|пмоль/л|нмоль/л|пг/мл|μiu/ml|pmol/l|nmol/l|pg/ml)", line_lower)
+            common_units = _HORMONE_COMMON_UNITS_RE.search(line_lower)
             if common_units:
                 return common_units.group(0)
 
@@ -188,174 +253,108 @@ class MedicalDataParser:
         """парсинг гормональных анализов с полной структурой"""
         results = {}
         lines = text.split("\n")
-
-        params_map = HORMONES_PARSER
-
-        for i, line in enumerate(lines):
-            line_lower = line.lower().strip()
-
-            for param_key, keywords in params_map.items():
-                if any(keyword in line_lower for keyword in keywords):
-                    for offset in range(1, 4):
-                        if i + offset >= len(lines):
-                            break
-
-                        check_line = lines[i + offset].strip()
-                        match = re.search(r"(\d+[\.,]\d+|\d+)\*?", check_line)
-
-                        if match:
-                            try:
-                                value = float(match.group(1).replace(",", "."))
-                                if param_key not in results:
-                                    results[param_key] = {
-                                        "value": value,
-                                        "unit": self._get_hormone_unit(param_key, lines[i:i + offset + 1]),
-                                        "reference": self._get_reference(lines[i:i + offset + 1]),
-                                        "status": self._determine_status(lines[i:i + offset + 1], value),
-                                    }
-                                    logger.info(f"найден {param_key}: {value}")
-                                break
-                            except ValueError:
-                                continue
-                    break
+        # Нижний регистр один раз на весь текст, а не для каждой строки в каждой проверке
+        lower_lines = text.lower().split("\n")
+
+        # Строки с ключевыми словами находятся одним проходом по всему тексту
+        for i, param_key in match_lines(text, AnalysisType.HORMONES).items():
+            for offset, value in self._window_values(lines, i):
+                if param_key not in results:
+                    results[param_key] = {
+                        "value": value,
+                        "unit": self._get_hormone_unit(param_key, lower_lines[i:i + offset + 1]),
+                        "reference": self._get_reference(lines[i:i + offset + 1]),
+                        "status": self._determine_status(lines[i:i + offset + 1], value),
+                    }
+                    logger.info(f"найден {param_key}: {value}")
+                break
 
         return results
+
+    def _window_values(self, lines: list[str], i: int):
+        """Числа из строк под ключевым словом (до трёх), по одному - первому - на строку
+
+        Окно просматривается одним проходом регулярного выражения.
+        Возвращает (смещение строки, значение)
+        """
+        window = "\n".join(lines[i + 1:i + 4])
+        for match in _LINE_NUMBER_RE.finditer(window):
+            offset = window.count("\n", 0, match.start(1)) + 1
+            yield offset, float(match.group(1).replace(",", "."))
+
     def parse_blood_general(self, text: str) -> dict:
         """парсинг общего анализа крови с полной структурой"""
         results = {}
         lines = text.split("\n")
-
-        params_map = BLOOD_PARSER
-        leuko_params_map = BLOOD_LEUKO_PARAMS
-
-        for i, line in enumerate(lines):
-            line_lower = line.lower().strip()
-
-            for param_key, keywords in {**params_map, **leuko_params_map}.items():
-                if any(keyword in line_lower for keyword in keywords):
-                    # для процентных значений
-                    if param_key in leuko_params_map:
-                        for offset in range(1, 4):
-                            if i + offset >= len(lines):
-                                break
-
-                            check_line = lines[i + offset].strip()
-                            match = re.search(r"(\d+[\.,]\d+|\d+)%?", check_line)
-
-                            if match:
-                                try:
-                                    value = float(match.group(1).replace(",", "."))
-                                    if 0 <= value <= 100:
-                                        results[param_key] = {
-                                            "value": value,
-                                            "unit": "%",
-                                            "reference": self._get_reference(lines[i:i + offset + 1]),
-                                            "status": self._determine_status(lines[i:i + offset + 1], value),
-                                        }
-                                        logger.info(f"найден {param_key}: {value}%")
-                                        break
-                                except ValueError:
-                                    continue
+        lower_lines = text.lower().split("\n")
+
+        for i, param_key in match_lines(text, AnalysisType.BLOOD_GENERAL).items():
+            # для процентных значений
+            if param_key in BLOOD_LEUKO_PARAMS:
+                for offset, value in self._window_values(lines, i):
+                    if 0 <= value <= 100:
+                        results[param_key] = {
+                            "value": value,
+                            "unit": "%",
+                            "reference": self._get_reference(lines[i:i + offset + 1]),
+                            "status": self._determine_status(lines[i:i + offset + 1], value),
+                        }
+                        logger.info(f"найден {param_key}: {value}%")
                         break
-                    else:
-                        # для остальных параметров
-                        for offset in range(1, 4):
-                            if i + offset >= len(lines):
-                                break
-
-                            check_line = lines[i + offset].strip()
-                            match = re.search(r"(\d+[\.,]\d+|\d+)\*?", check_line)
-
-                            if match:
-                                try:
-                                    value = float(match.group(1).replace(",", "."))
-                                    if self._validate_value(param_key, value):
-                                        results[param_key] = {
-                                            "value": value,
-                                            "unit": self._get_unit(param_key, lines[i:i + offset + 1]),
-                                            "reference": self._get_reference(lines[i:i + offset + 1]),
-                                            "status": self._determine_status(lines[i:i + offset + 1], value),
-                                        }
-                                        logger.info(f"найден {param_key}: {value}")
-                                        break
-                                except ValueError:
-                                    continue
+            else:
+                # для остальных параметров
+                for offset, value in self._window_values(lines, i):
+                    if self._validate_value(param_key, value):
+                        results[param_key] = {
+                            "value": value,
+                            "unit": self._get_unit(param_key, lower_lines[i:i + offset + 1]),
+                            "reference": self._get_reference(lines[i:i + offset + 1]),
+                            "status": self._determine_status(lines[i:i + offset + 1], value),
+                        }
+                        logger.info(f"найден {param_key}: {value}")
                         break
 
         return results
 
     def _validate_value(self, param: str, value: float) -> bool:
         """Валидация разумности значения"""
-        ranges = RANGES_PARSER
-
-        if param in ranges:
-            min_val, max_val = ranges[param]
-            return min_val <= value <= max_val
-
-        return True
+        return validate_value(param, value)
 
     def parse_blood_biochem(self, text: str) -> dict:
         """парсинг биохимии с полной структурой"""
         results = {}
         lines = text.split("\n")
-
-        params_map = BIOCHEM_PARSER
-
-        for i, line in enumerate(lines):
-            line_lower = line.lower().strip()
-
-            for param_key, keywords in params_map.items():
-                if any(keyword in line_lower for keyword in keywords):
-                    for offset in range(1, 4):
-                        if i + offset >= len(lines):
-                            break
-
-                        check_line = lines[i + offset].strip()
-                        match = re.search(r"(\d+[\.,]\d+|\d+|\d+\.\d+)\*?", check_line)
-
-                        if match:
-                            try:
-                                value = float(match.group(1).replace(",", "."))
-                                if self._validate_value(param_key, value):
-                                    if param_key not in results:
-                                        results[param_key] = {
-                                            "value": value,
-                                            "unit": self._get_unit(param_key, lines[i:i + offset + 1]),
-                                            "reference": self._get_reference(lines[i:i + offset + 1]),
-                                            "status": self._determine_status(lines[i:i + offset + 1], value),
-                                        }
-                                        logger.info(f"найден {param_key}: {value}")
-                                break
-                            except ValueError:
-                                continue
-                    break
+        lower_lines = text.lower().split("\n")
+
+        for i, param_key in match_lines(text, AnalysisType.BLOOD_BIOCHEM).items():
+            for offset, value in self._window_values(lines, i):
+                if self._validate_value(param_key, value) and param_key not in results:
+                    results[param_key] = {
+                        "value": value,
+                        "unit": self._get_unit(param_key, lower_lines[i:i + offset + 1]),
+                        "reference": self._get_reference(lines[i:i + offset + 1]),
+                        "status": self._determine_status(lines[i:i + offset + 1], value),
+                    }
+                    logger.info(f"найден {param_key}: {value}")
+                break
 
         return results
 
     def _get_unit(self, param_key: str, lines: list[str]) -> str:
-        """Извлечение единицы измерения"""
-        unit_patterns = {
-            "glucose": r"ммоль/л",
-            "urea": r"ммоль/л",
-            "creatinine": r"мкмоль/л",
-            "bilirubin_total": r"мкмоль/л",
-            "alt": r"ед/л",
-            "ast": r"ед/л",
-            "atherogenic_index": r"< \d+\.\d+",  # Для индекса атерогенности
-            "gfr_ckd_epi": r"мл/мин/1,73м\^2",
-        }
+        """Извлечение единицы измерения (строки уже в нижнем регистре)"""
+        pattern = _UNIT_PATTERNS.get(param_key)
+        if pattern is None:
+            return ""
         for line in lines:
-            for key, pattern in unit_patterns.items():
-                if key == param_key:
-                    match = re.search(pattern, line.lower())
-                    if match:
-                        return match.group(0)
+            match = pattern.search(line)
+            if match:
+                return match.group(0)
         return ""
 
     def _get_reference(self, lines: list[str]) -> str:
         """Извлечение референсного диапазона"""
         for line in lines:
-            match = re.search(r"(\d+\.\d+ - \d+\.\d+|\d+\.\d+)", line)
+            match = _REF_RE.search(line)
             if match:
                 return match.group(0)
         return ""
@@ -365,11 +364,11 @@ class MedicalDataParser:
         for line in lines:
             if "*" in line:
                 # Извлечь референсный диапазон
-                match = re.search(r"(\d+\.\d+)-(\d+\.\d+)", line)
+                match = _RANGE_RE.search(line)
                 if match:
                     low, high = float(match.group(1)), float(match.group(2))
                     return "понижен" if value < low else "повышен"
-            match = re.search(r"(\d+\.\d+)-(\d+\.\д+)", line)
+            match = _RANGE_RE.search(line)
             if match:
                 low, high = float(match.group(1)), float(match.group(2))
                 if low <= value <= high:
@@ -381,9 +380,9 @@ class MedicalDataParser:
         text_lower = text.lower()
 
         # Ключевые слова для разных типов анализов
-        blood_general_keywords = ANALYSIS_KEYWORDS.get("blood_general")
-        biochem_keywords = ANALYSIS_KEYWORDS.get("biochem")
-        hormones_keywords = ANALYSIS_KEYWORDS.get("hormones")
+        blood_general_keywords = ANALYSIS_KEYWORDS["blood_general"]
+        biochem_keywords = ANALYSIS_KEYWORDS["blood_biochem"]
+        hormones_keywords = ANALYSIS_KEYWORDS["hormones"]
 
         blood_general_score = sum(1 for keyword in blood_general_keywords if keyword in text_lower)
         biochem_score = sum(1 for keyword in biochem_keywords if keyword in text_lower)
@@ -399,12 +398,16 @@ class MedicalDataParser:
             return "unknown"
 
 
+# Парсер без состояния: один экземпляр на процесс вместо нового на каждую задачу
+_REGEX_PARSER = MedicalDataParser()
+
+
 class FileUploadHandler:
     """Обработчик загрузки файлов с проверками безопасности"""
 
     def __init__(self):
         self.file_processor = SecureFileProcessor()
-        self.max_file_size = settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        self.max_file_size = settings.MAX_UPLOAD_FILE_SIZE
         self.allowed_extensions = settings.ALLOWED_FILE_EXTENSIONS
 
     def validate_file(self, uploaded_file) -> bool:
@@ -470,24 +473,31 @@ class DataRetentionManager:
         expired_time = timezone.now() - timedelta(minutes=5)
         expired_sessions = AnalysisSession.objects.filter(
             processing_started__lt=expired_time, processing_status__in=[Status.UPLOADING, Status.PROCESSING]
-        )
+        ).only("pk", "user", "temp_file_path")
 
+        # Записи лога и удаление сессий - пачкой после цикла, а не запросом на каждую сессию
+        cleanup_logs = []
+        expired_ids = []
         for session in expired_sessions:
             path = Path(session.temp_file_path)
             if session.temp_file_path and path.exists():
                 try:
                     path.unlink()
-                    SecurityLog.objects.create(
-                        user=session.user,
-                        action="FILE_CLEANUP",
-                        details=f"Удален просроченный файл сессии {session.pk}",
-                        ip_address=None,
+                    cleanup_logs.append(
+                        SecurityLog(
+                            user_id=session.user_id,
+                            action="FILE_CLEANUP",
+                            details=f"Удален просроченный файл сессии {session.pk}",
+                            ip_address=None,
+                        )
                     )
                 except Exception as e:
                     logger.error(f"Ошибка очистки файла сессии {session.pk}: {e}")
 
-            # Удаляем саму сессию
-            session.delete()
+            expired_ids.append(session.pk)
+
+        SecurityLog.objects.bulk_create(cleanup_logs, batch_size=500)
+        AnalysisSession.objects.filter(pk__in=expired_ids).delete()
 
         # 2. Удаляем ошибочные сессии старше 1 часа
         # TODO: тут для прода сделать 7-30 дней, т.к. для медицины служат доказательной базой(аудита, compliance с GDPR или 152-ФЗ)
@@ -497,14 +507,14 @@ class DataRetentionManager:
         count_errors = old_completed.count()
         old_completed.delete()
 
-        logger.info(f"Очистка: удалено {expired_sessions.count()} просроченных, {count_errors} ошибочных сессий")
+        logger.info(f"Очистка: удалено {len(expired_ids)} просроченных, {count_errors} ошибочных сессий")
 
     @staticmethod
     def verify_file_deletion():
         """Проверка, что все файлы действительно удалены"""
         sessions_with_files = AnalysisSession.objects.filter(
             temp_file_path__isnull=False, temp_file_path__gt="", file_deleted_timestamp__isnull=True
-        )
+        ).only("pk", "user", "temp_file_path", "upload_timestamp")
 
         for session in sessions_with_files:
             path = Path(session.temp_file_path)
@@ -516,10 +526,10 @@ class DataRetentionManager:
                         path.unlink()
                         session.temp_file_path = ""
                         session.file_deleted_timestamp = timezone.now()
-                        session.save()
+                        session.save(update_fields=["temp_file_path", "file_deleted_timestamp"])
 
                         SecurityLog.objects.create(
-                            user=session.user,
+                            user_id=session.user_id,
                             action="FORCE_FILE_DELETION",
                             details=f"Принудительно удален файл сессии {session.pk}",
                             ip_address=None,
@@ -530,17 +540,16 @@ class DataRetentionManager:
                 # Файл уже не существует, обновляем запись
                 session.temp_file_path = ""
                 session.file_deleted_timestamp = timezone.now()
-                session.save()
+                session.save(update_fields=["temp_file_path", "file_deleted_timestamp"])
 
 
 @shared_task(queue="default")
 def schedule_file_deletion(file_path: str, session_id: int):
-    """Планируем удаление файла через 60 секунд"""
-    from django.utils import timezone
-    import time
+    """Удаление временного файла
 
-    # Ждем 60 секунд
-    time.sleep(settings.FILE_RETENTION_SECONDS)
+    Задержку задаёт вызывающий через countdown: задача ждёт в брокере и не занимает воркер
+    """
+    from django.utils import timezone
 
     try:
         path = Path(file_path)
@@ -599,7 +608,7 @@ def process_medical_file(session_id: int):
         # Определяем основной тип для совместимости
         primary_type = grouped_parser.determine_primary_type(grouped_results)
         session.analysis_type = primary_type
-        session.save()
+        session.save(update_fields=["analysis_type"])
 
         logger.info(f"Лаборатория: {laboratory}")
         logger.info(f"Основной тип: {primary_type}")
@@ -667,7 +676,7 @@ def process_medical_file(session_id: int):
         # 8. Обновляем статус сессии
         session.processing_status = Status.COMPLETED
         session.processing_completed = timezone.now()
-        session.save()
+        session.save(update_fields=["processing_status", "processing_completed"])
 
         # 9. Планируем удаление временного файла
         schedule_file_deletion.apply_async(
@@ -676,7 +685,7 @@ def process_medical_file(session_id: int):
 
         # 10. Логируем успех
         SecurityLog.objects.create(
-            user=session.user,
+            user_id=session.user_id,
             action="FILE_PROCESSED",
             details=f"Файл обработан ({parsing_method}, лаб: {laboratory}). "
             f"Найдено параметров: {total_params} "
@@ -696,7 +705,7 @@ def process_medical_file(session_id: int):
             session.processing_status = Status.ERROR
             session.error_message = str(e)
             session.processing_completed = timezone.now()
-            session.save()
+            session.save(update_fields=["processing_status", "error_message", "processing_completed"])
 
             # Всё равно планируем удаление файла
             if session.temp_file_path and Path(session.temp_file_path).exists():
@@ -837,7 +846,7 @@ class GroupedAnalysisParser:
         logger.info("Используем regex для парсинга")
         grouped_results["_metadata"]["parsing_method"] = "regex"
 
-        parser = MedicalDataParser()
+        parser = _REGEX_PARSER
 
         # Парсим каждый тип отдельно
         try:
@@ -16,6 +16,7 @@ class ImagePreprocessor:
         apply_binarization: bool = True,
         noise_kernel_size: int = 3,
         min_dpi_for_upscale: int = 200,
+        max_dpi_for_downscale: int = 330,
         skew_range: float = 10.0,
     ):
         self.target_dpi = target_dpi
@@ -24,6 +25,9 @@ class ImagePreprocessor:
         self.apply_binarization = apply_binarization
         self.noise_kernel_size = noise_kernel_size
         self.min_dpi_for_upscale = min_dpi_for_upscale
+        # OCR time grows with pixel count: anything noticeably above target_dpi
+        # (phone photos, 360-600 DPI scans) is brought down before denoising and OCR
+        self.max_dpi_for_downscale = max_dpi_for_downscale
         self.skew_range = skew_range
 
     def process(self, image_path: str, save_debug: bool = False) -> np.ndarray:
@@ -32,6 +36,18 @@ class ImagePreprocessor:
         image = self._load_image(image_path)
         logger.debug(f"loaded image: {image.shape}")
 
+        return self._run_pipeline(image, image_path, save_debug)
+
+    def process_array(self, image: np.ndarray) -> np.ndarray:
+        """Preprocess an image already in memory (e.g. a rendered PDF page), no file round-trip"""
+        logger.debug(f"starting preprocessing: array {image.shape}")
+        # rendered pages are already at OCR DPI; estimating it from the width
+        # would shrink landscape and wide pages below target
+        return self._run_pipeline(image, "", save_debug=False, resize=False)
+
+    def _run_pipeline(
+        self, image: np.ndarray, image_path: str, save_debug: bool, resize: bool = True
+    ) -> np.ndarray:
         # step 1: grayscale
         if len(image.shape) == 3:
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -42,9 +58,12 @@ class ImagePreprocessor:
             self._save_debug_image(gray, image_path, "01_grayscale")
 
         # step 2: smart resize
-        estimated_dpi = gray.shape[1] / 8.3
-        logger.debug(f"estimated DPI: {estimated_dpi:.0f}")
-        resized = self._smart_resize(gray, estimated_dpi)
+        if resize:
+            estimated_dpi = gray.shape[1] / 8.3
+            logger.debug(f"estimated DPI: {estimated_dpi:.0f}")
+            resized = self._smart_resize(gray, estimated_dpi)
+        else:
+            resized = gray
 
         if save_debug:
             self._save_debug_image(resized, image_path, "02_resized")
@@ -102,7 +121,7 @@ class ImagePreprocessor:
             return cv2.resize(
                 image, (new_width, new_height), interpolation=cv2.INTER_CUBIC
             )
-        elif estimated_dpi > 400:
+        elif estimated_dpi > self.max_dpi_for_downscale:
             scale = self.target_dpi / estimated_dpi
             new_width = int(width * scale)
             new_height = int(height * scale)
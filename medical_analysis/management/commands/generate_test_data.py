@@ -2,7 +2,7 @@ from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 
 from medical_analysis.enums import SubcriptionType
-from medical_analysis.models import UserProfile, MedicalData, AnalysisSession, Subscription
+from medical_analysis.models import MedicalData, AnalysisSession, Subscription
 from django.utils import timezone
 from datetime import timedelta
 import random
@@ -44,8 +44,7 @@ class Command(BaseCommand):
                     last_name="Пользователь",
                 )
                 Subscription.objects.create(user=user, subscription_type=SubcriptionType.TRIAL)
-
-                UserProfile.objects.create(user=user, language_preference="ru")
+                # Профиль (language_preference="ru" по умолчанию) создаётся сигналом post_save
 
                 test_users.append(user)
                 self.stdout.write(f"👤 Создан пользователь: {username}")
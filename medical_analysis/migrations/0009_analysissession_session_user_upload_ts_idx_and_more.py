@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-15 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_analysis', '0008_alter_subscription_created_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analysissession',
+            index=models.Index(fields=['user', '-upload_timestamp'], name='session_user_upload_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='securitylog',
+            index=models.Index(fields=['user', '-timestamp'], name='seclog_user_ts_idx'),
+        ),
+    ]
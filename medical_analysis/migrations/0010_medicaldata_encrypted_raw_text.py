@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-15 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_analysis', '0009_analysissession_session_user_upload_ts_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicaldata',
+            name='encrypted_raw_text',
+            field=models.TextField(blank=True, default='', help_text='Зашифрованный исходный текст OCR'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-15 13:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_analysis', '0010_medicaldata_encrypted_raw_text'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='medicaldata',
+            index=models.Index(fields=['user', '-analysis_date'], name='medicaldata_user_date_idx'),
+        ),
+    ]
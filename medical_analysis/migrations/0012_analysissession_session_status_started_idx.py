@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-15 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_analysis', '0011_medicaldata_medicaldata_user_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analysissession',
+            index=models.Index(fields=['processing_status', 'processing_started'], name='session_status_started_idx'),
+        ),
+    ]
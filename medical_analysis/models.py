@@ -30,6 +30,16 @@ class UserProfile(models.Model):
             self.encryption_key = base64.b64encode(key).decode()
         super().save(*args, **kwargs)
 
+    @classmethod
+    def for_user(cls, user):
+        """Получить профиль пользователя (кешируется на объекте user)"""
+        try:
+            return user.profile
+        except cls.DoesNotExist:
+            # Пользователи, созданные до сигнала post_save, могут быть без профиля
+            profile, created = cls.objects.get_or_create(user=user)
+            return profile
+
     def get_fernet_cipher(self):
         """Получить объект Fernet для шифрования/расшифровки"""
         key = base64.b64decode(self.encryption_key.encode())
@@ -77,6 +87,11 @@ class AnalysisSession(models.Model):
 
     class Meta:
         ordering = ["-upload_timestamp"]
+        indexes = [
+            models.Index(fields=["user", "-upload_timestamp"], name="session_user_upload_ts_idx"),
+            # Поиск зависших сессий при очистке (DataRetentionManager.cleanup_expired_sessions)
+            models.Index(fields=["processing_status", "processing_started"], name="session_status_started_idx"),
+        ]
 
     def __str__(self):
         return f"Сессия {self.pk} - {self.user.username} - {self.processing_status}"
@@ -92,6 +107,7 @@ class MedicalData(models.Model):
         AnalysisSession, on_delete=models.SET_NULL, null=True, blank=True, related_name="medical_data"
     )
     encrypted_results = models.TextField(help_text="Зашифрованные результаты анализов")
+    encrypted_raw_text = models.TextField(blank=True, help_text="Зашифрованный исходный текст OCR")
     analysis_date = models.DateField(help_text="Дата проведения анализа")
     analysis_type = models.CharField(max_length=20, choices=AnalysisType.choices)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -106,6 +122,9 @@ class MedicalData(models.Model):
 
     class Meta:
         ordering = ["-analysis_date", "-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-analysis_date"], name="medicaldata_user_date_idx"),
+        ]
         verbose_name = "Медицинские данные"
         verbose_name_plural = "Медицинские данные"
 
@@ -113,20 +132,42 @@ class MedicalData(models.Model):
         return f"Анализ {self.analysis_type} - {self.user.username} - {self.analysis_date}"
 
     def encrypt_and_save(self, data_dict):
-        """Шифрование данных перед сохранением"""
+        """Шифрование данных перед сохранением
+
+        raw_text шифруется отдельным токеном, чтобы его не приходилось расшифровывать
+        вместе с результатами, когда исходный текст не нужен
+        """
         cipher = self.user.profile.get_fernet_cipher()
-        json_data = json.dumps(data_dict, ensure_ascii=False).encode()
-        encrypted_data = cipher.encrypt(json_data)
-        self.encrypted_results = base64.b64encode(encrypted_data).decode()
+        data = dict(data_dict)
+        raw_text = data.pop("raw_text", None)
+
+        json_data = json.dumps(data, ensure_ascii=False).encode()
+        self.encrypted_results = base64.b64encode(cipher.encrypt(json_data)).decode()
+        if raw_text is not None:
+            self.encrypted_raw_text = base64.b64encode(cipher.encrypt(raw_text.encode())).decode()
         self.save()
 
-    def decrypt_data(self):
-        """Расшифровка данных"""
+    def decrypt_data(self, cipher=None, include_raw=True):
+        """Расшифровка данных
+
+        cipher можно передать заранее (UserProfile.get_fernet_cipher), чтобы при
+        расшифровке нескольких записей пользователя не создавать его для каждой.
+        include_raw=False пропускает расшифровку исходного текста OCR (raw_text)
+        """
         try:
-            cipher = self.user.profile.get_fernet_cipher()
+            if cipher is None:
+                cipher = self.user.profile.get_fernet_cipher()
             encrypted_bytes = base64.b64decode(self.encrypted_results.encode())
-            decrypted_data = cipher.decrypt(encrypted_bytes)
-            return json.loads(decrypted_data.decode())
+            decrypted_data = json.loads(cipher.decrypt(encrypted_bytes).decode())
+
+            if not include_raw:
+                # Старые записи хранят raw_text внутри общего блока
+                decrypted_data.pop("raw_text", None)
+            elif self.encrypted_raw_text:
+                raw_bytes = base64.b64decode(self.encrypted_raw_text.encode())
+                decrypted_data["raw_text"] = cipher.decrypt(raw_bytes).decode()
+
+            return decrypted_data
         except Exception as e:
             print(f"Ошибка расшифровки: {e}")
             return None
@@ -146,6 +187,9 @@ class SecurityLog(models.Model):
 
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["user", "-timestamp"], name="seclog_user_ts_idx"),
+        ]
 
     def __str__(self):
         return f"{self.action} - {self.timestamp}"
@@ -24,6 +24,10 @@ class OCREngine:
             )
         return self._reader
 
+    def load(self) -> None:
+        """Load models now instead of on the first recognition"""
+        _ = self.reader
+
     def extract_text(self, image: np.ndarray) -> str:
         """extract text from preprocessed image"""
         results = self.reader.readtext(
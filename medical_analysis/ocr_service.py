@@ -1,4 +1,5 @@
 import logging
+import threading
 from typing import Optional
 import numpy as np
 from medical_analysis.image_preprocessor import ImagePreprocessor
@@ -45,11 +46,14 @@ class OCRService:
 
 # singleton instance
 _service_instance: Optional[OCRService] = None
+_service_lock = threading.Lock()
 
 
 def get_ocr_service(use_gpu: bool = False) -> OCRService:
-    """get or create OCR service singleton"""
+    """get or create OCR service singleton (thread-safe: only one instance is ever built)"""
     global _service_instance
     if _service_instance is None:
-        _service_instance = OCRService(use_gpu=use_gpu)
+        with _service_lock:
+            if _service_instance is None:
+                _service_instance = OCRService(use_gpu=use_gpu)
     return _service_instance
\ No newline at end of file
@@ -77,7 +77,7 @@ class MedicalDataSerializer(serializers.ModelSerializer):
 
     def get_decrypted_data(self, obj):
         """Получить расшифрованные данные"""
-        decrypted = obj.decrypt_data()
+        decrypted = obj.decrypt_data(include_raw=False)
         if decrypted:
             # Возвращаем только parsed_data, скрываем raw_text
             return decrypted.get("parsed_data", {})
@@ -95,9 +95,9 @@ class FileUploadSerializer(serializers.Serializer):
         from pathlib import Path
 
         # Проверка размера
-        if value.size > settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+        if value.size > settings.MAX_UPLOAD_FILE_SIZE:
             raise serializers.ValidationError(
-                f"Файл слишком большой. Максимальный размер: {settings.FILE_UPLOAD_MAX_MEMORY_SIZE // (1024 * 1024)} МБ"
+                f"Файл слишком большой. Максимальный размер: {settings.MAX_UPLOAD_FILE_SIZE // (1024 * 1024)} МБ"
             )
 
         # Проверка расширения
@@ -202,8 +202,10 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             )
             Subscription.objects.create(user=user, subscription_type=SubcriptionType.TRIAL)
 
-            # Создаем профиль
-            UserProfile.objects.create(user=user, language_preference=language_preference)
+            # Профиль создан сигналом post_save, сохраняем выбранный язык
+            profile = UserProfile.for_user(user)
+            profile.language_preference = language_preference
+            profile.save(update_fields=["language_preference", "updated_at"])
 
             # Логируем регистрацию
             SecurityLog.objects.create(
@@ -1,16 +1,27 @@
 from pathlib import Path
 
-from django.db.models.signals import pre_delete
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
 
-from medical_analysis.enums import Status
-from medical_analysis.models import MedicalData, SecurityLog
+from medical_analysis.enums import StatusValue
+from medical_analysis.models import MedicalData, SecurityLog, UserProfile
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+@receiver(post_save, sender=User)
+def create_user_profile(sender, instance, created, **kwargs):
+    """Создание профиля вместе с пользователем, чтобы не делать get_or_create в каждом запросе"""
+    # loaddata / восстановление фикстур: профили загружаются из тех же данных
+    if kwargs.get("raw"):
+        return
+    if created:
+        UserProfile.objects.create(user=instance)
+
+
 @receiver(pre_delete, sender=MedicalData)
 def delete_related_session(sender, instance, **kwargs):
     """Удаление связанной сессии при удалении MedicalData, если она не нужна"""
@@ -18,7 +29,7 @@ def delete_related_session(sender, instance, **kwargs):
     if session:
         # Проверяем, есть ли другие MedicalData, связанные с этой сессией
         other_medical_data = MedicalData.objects.filter(session=session).exclude(id=instance.id).exists()
-        if not other_medical_data and session.processing_status in [Status.COMPLETED, Status.ERROR]:
+        if not other_medical_data and session.processing_status in StatusValue.FINISHED:
             session_id = session.id
             # Устанавливаем file_deleted_timestamp, если файл ещё существует
             if session.temp_file_path and Path(session.temp_file_path).exists():
@@ -1,2 +1,402 @@
+import base64
+import json
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from medical_analysis.api_views import MedicalDataViewSet
+from medical_analysis.constants import UNITS_RU, get_reference_range, normalize_unit
+from medical_analysis.constants.units import _preclean
+from medical_analysis.enums import AnalysisType, Status
+from medical_analysis.file_processor import DataRetentionManager, MedicalDataParser
+from medical_analysis.models import AnalysisSession, MedicalData, SecurityLog, UserProfile
+
+HORMONES_TEXT = (
+    "ТТГ\n2.5 мкМЕ/мл\n0.4-4.0\nТ4 свободный\n15,3\nпмоль/л\n"
+    "Кортизол\nрезультат\n450\nнмоль/л\nПролактин\n310 мЕд/л"
+)
+BIOCHEM_TEXT = (
+    "Глюкоза\n5.4 ммоль/л\nКреатинин\n80 мкмоль/л\nАЛТ\n25 ед/л\n"
+    "Мочевина\n\n6.1\nХолестерин общий\n4,8 ммоль/л"
+)
+BLOOD_GENERAL_TEXT = "Гемоглобин\n140 г/л\nНейтрофилы абс\n3.2\nНейтрофилы\n55 %\nЛейкоциты\n6.5\nТромбоциты\n250"
+
+
+def _item(value, unit="", reference="", status_="неизвестно"):
+    return {"value": value, "unit": unit, "reference": reference, "status": status_}
+
+
+class MedicalDataParserTests(SimpleTestCase):
+    """Результаты regex-парсера на типовых фрагментах OCR"""
+
+    def setUp(self):
+        self.parser = MedicalDataParser()
+
+    def test_parse_hormones(self):
+        self.assertEqual(
+            self.parser.parse_hormones(HORMONES_TEXT),
+            {
+                "tsh": _item(2.5, "мкме/мл", "2.5"),
+                "cortisol": _item(450.0),
+                "prolactin": _item(310.0),
+            },
+        )
+
+    def test_parse_blood_biochem(self):
+        self.assertEqual(
+            self.parser.parse_blood_biochem(BIOCHEM_TEXT),
+            {
+                "glucose": _item(5.4, "ммоль/л", "5.4"),
+                "creatinine": _item(80.0, "мкмоль/л"),
+                "alt": _item(25.0, "ед/л"),
+                "urea": _item(6.1, reference="6.1"),
+                "cholesterol": _item(4.8),
+            },
+        )
+
+    def test_parse_blood_general(self):
+        # Раньше падал с TypeError на словаре паттернов
+        self.assertEqual(
+            self.parser.parse_blood_general(BLOOD_GENERAL_TEXT),
+            {
+                "hemoglobin": _item(140.0),
+                # "нейтрофилы абс" не перехватывается более коротким "нейтрофилы"
+                "neutrophils_absolute": _item(3.2, reference="3.2"),
+                "neutrophils_percentage": _item(55.0, "%"),
+                "leukocytes": _item(6.5, reference="6.5"),
+                "platelets": _item(250.0),
+            },
+        )
+
+    def test_parsers_ignore_other_types(self):
+        self.assertEqual(self.parser.parse_blood_general(HORMONES_TEXT), {})
+        self.assertEqual(self.parser.parse_hormones(BIOCHEM_TEXT), {})
+        self.assertEqual(self.parser.parse_blood_biochem(BLOOD_GENERAL_TEXT), {})
+
+    def test_status_in_reference_range(self):
+        result = self.parser.parse_blood_biochem("Глюкоза\n5.4 ммоль/л 3.9-6.1\n")
+        self.assertEqual(result["glucose"]["status"], "норма")
+
+    def test_detect_analysis_type(self):
+        self.assertEqual(self.parser.detect_analysis_type(HORMONES_TEXT), AnalysisType.HORMONES)
+        self.assertEqual(self.parser.detect_analysis_type(BIOCHEM_TEXT), AnalysisType.BLOOD_BIOCHEM)
+        self.assertEqual(self.parser.detect_analysis_type(BLOOD_GENERAL_TEXT), AnalysisType.BLOOD_GENERAL)
+
+
+class ReferenceRangeTests(SimpleTestCase):
+    """Референсные диапазоны с учётом пола"""
+
+    def test_combined_range_without_gender(self):
+        # Без пола - объединение мужского и женского диапазонов
+        self.assertEqual(get_reference_range("hemoglobin"), (120, 170))
+        self.assertEqual(get_reference_range("estradiol"), (25.8, 60.7))
+        self.assertIsNone(get_reference_range("unknown"))
+
+    def test_range_by_gender(self):
+        self.assertEqual(get_reference_range("hemoglobin", "male"), (130, 170))
+        self.assertEqual(get_reference_range("hemoglobin", "female"), (120, 150))
+        # Неизвестный пол - объединённый диапазон; у параметров без пола он общий
+        self.assertEqual(get_reference_range("hemoglobin", "other"), (120, 170))
+        self.assertEqual(get_reference_range("estradiol", "male"), (25.8, 60.7))
+
+    def test_alias_in_any_case(self):
+        self.assertEqual(get_reference_range("HGB"), (120, 170))
+        self.assertEqual(get_reference_range("Hb", "Female"), (120, 150))
+
+
+class NormalizeUnitTests(SimpleTestCase):
+    """Нормализация единиц измерения из OCR"""
+
+    def test_alias_lookup(self):
+        self.assertEqual(normalize_unit("mmol/l"), "ммоль/л")
+        self.assertEqual(normalize_unit(" MMOL/L "), "ммоль/л")
+        # Неизвестные единицы возвращаются как есть
+        self.assertEqual(normalize_unit("ratio"), "ratio")
+        self.assertEqual(normalize_unit(""), "")
+
+    def test_results_are_cached(self):
+        normalize_unit.cache_clear()
+        normalize_unit("г/л")
+        normalize_unit("г/л")
+        self.assertEqual(normalize_unit.cache_info().hits, 1)
+
+    def test_inner_whitespace(self):
+        self.assertEqual(normalize_unit("ммоль / л"), "ммоль/л")
+        self.assertEqual(normalize_unit("Mmol\t/ L"), "ммоль/л")
+
+    def test_canonical_units_unchanged(self):
+        for unit in UNITS_RU.values():
+            self.assertEqual(normalize_unit(unit), unit)
+
+    def test_clean_input_not_copied(self):
+        unit = "ммоль/л"
+        self.assertIs(_preclean(unit), unit)
+        self.assertEqual(_preclean(" Ммоль/Л "), "ммоль/л")
+
+
+class CalculateDifferencesTests(SimpleTestCase):
+    """Сравнение показателей двух анализов (MedicalDataViewSet.compare)"""
+
+    def setUp(self):
+        self.calculate = MedicalDataViewSet()._calculate_differences
+
+    def test_only_shared_keys(self):
+        differences = self.calculate({"glucose": 5.0, "urea": 6.0}, {"glucose": 5.5, "alt": 20})
+        self.assertEqual(list(differences), ["glucose"])
+        self.assertAlmostEqual(differences["glucose"]["absolute_change"], 0.5)
+        self.assertEqual(differences["glucose"]["percent_change"], 10.0)
+        self.assertEqual(differences["glucose"]["trend"], "up")
+
+    def test_trend(self):
+        differences = self.calculate({"glucose": 4, "urea": 4}, {"glucose": 3, "urea": "4"})
+        self.assertEqual(differences["glucose"]["trend"], "down")
+        self.assertEqual(differences["urea"]["trend"], "stable")
+
+    def test_zero_baseline(self):
+        # "0" строкой проходил проверку val1 != 0 и приводил к делению на ноль
+        differences = self.calculate({"glucose": "0"}, {"glucose": 5})
+        self.assertEqual(differences["glucose"]["percent_change"], 0)
+
+    def test_not_comparable_values(self):
+        differences = self.calculate({"glucose": "н/д", "urea": None}, {"glucose": 5, "urea": 6})
+        self.assertIn("note", differences["glucose"])
+        self.assertNotIn("urea", differences)
+
+
+class UserProfileSignalTests(TestCase):
+    """Профиль создаётся сигналом post_save вместе с пользователем"""
+
+    def test_profile_created_with_user(self):
+        user = User.objects.create_user(username="patient", password="password")
+        self.assertTrue(UserProfile.objects.filter(user=user).exists())
+        self.assertEqual(UserProfile.for_user(user), user.profile)
+
+    def test_for_user_creates_missing_profile(self):
+        # Пользователи, созданные до сигнала, получают профиль при первом обращении
+        user = User.objects.create_user(username="patient", password="password")
+        UserProfile.objects.filter(user=user).delete()
+
+        profile = UserProfile.for_user(User.objects.get(pk=user.pk))
+        self.assertEqual(profile.user_id, user.pk)
+        self.assertTrue(profile.encryption_key)
+
+    def test_raw_save_skips_profile(self):
+        # loaddata сохраняет с raw=True: профиль приходит из той же фикстуры
+        user = User(username="fixture")
+        user.save_base(raw=True)
+        self.assertFalse(UserProfile.objects.filter(user=user).exists())
+
+
+class MedicalDataEncryptionTests(TestCase):
+    """Шифрование результатов: raw_text хранится отдельным токеном"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="patient", password="password")
+        self.cipher = self.user.profile.get_fernet_cipher()
+
+    def _medical_data(self, **kwargs):
+        return MedicalData(
+            user=self.user, analysis_date=date(2025, 1, 15), analysis_type=AnalysisType.BLOOD_BIOCHEM, **kwargs
+        )
+
+    def test_round_trip(self):
+        medical_data = self._medical_data()
+        medical_data.encrypt_and_save({"glucose": {"value": 5.4}, "raw_text": "Глюкоза 5.4"})
+
+        medical_data.refresh_from_db()
+        self.assertNotEqual(medical_data.encrypted_raw_text, "")
+        self.assertEqual(medical_data.decrypt_data(), {"glucose": {"value": 5.4}, "raw_text": "Глюкоза 5.4"})
+        self.assertEqual(medical_data.decrypt_data(include_raw=False), {"glucose": {"value": 5.4}})
+
+    def test_legacy_blob_with_raw_text(self):
+        # Записи до разделения: raw_text внутри encrypted_results, encrypted_raw_text пуст
+        blob = json.dumps({"glucose": {"value": 5.4}, "raw_text": "Глюкоза 5.4"}, ensure_ascii=False).encode()
+        medical_data = self._medical_data(encrypted_results=base64.b64encode(self.cipher.encrypt(blob)).decode())
+        medical_data.save()
+
+        self.assertEqual(medical_data.decrypt_data(), {"glucose": {"value": 5.4}, "raw_text": "Глюкоза 5.4"})
+        self.assertEqual(medical_data.decrypt_data(include_raw=False), {"glucose": {"value": 5.4}})
+
+    def test_legacy_blob_without_raw_text(self):
+        blob = json.dumps({"glucose": {"value": 5.4}}).encode()
+        medical_data = self._medical_data(encrypted_results=base64.b64encode(self.cipher.encrypt(blob)).decode())
+        medical_data.save()
+
+        self.assertEqual(medical_data.decrypt_data(cipher=self.cipher), {"glucose": {"value": 5.4}})
+        self.assertEqual(medical_data.decrypt_data(cipher=self.cipher, include_raw=False), {"glucose": {"value": 5.4}})
+
+
+class MedicalDataFeedTests(TestCase):
+    """timeline и by_type всегда отдаются постранично"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="patient", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for day in (1, 2, 3):
+            medical_data = MedicalData(
+                user=self.user, analysis_date=date(2025, 1, day), analysis_type=AnalysisType.BLOOD_BIOCHEM
+            )
+            medical_data.encrypt_and_save({"parsed_data": {"glucose": 5.0 + day}})
+
+    def test_timeline_paginated_without_limit(self):
+        response = self.client.get(reverse("medical-data-timeline"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertIsNone(response.data["next"])
+        self.assertEqual(
+            [row["date"] for row in response.data["results"]], [date(2025, 1, 3), date(2025, 1, 2), date(2025, 1, 1)]
+        )
+
+    def test_timeline_next_page(self):
+        response = self.client.get(reverse("medical-data-timeline"), {"limit": 2})
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_by_type_paginated_without_limit(self):
+        response = self.client.get(reverse("medical-data-by-type"), {"type": AnalysisType.BLOOD_BIOCHEM})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["type"], AnalysisType.BLOOD_BIOCHEM)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_user_without_profile(self):
+        # Пользователи, созданные до сигнала post_save, не получают 500 вместо пустой ленты
+        user = User.objects.create_user(username="legacy", password="password")
+        UserProfile.objects.filter(user=user).delete()
+        self.client.force_authenticate(User.objects.get(pk=user.pk))
+
+        response = self.client.get(reverse("medical-data-timeline"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 0)
+        response = self.client.get(reverse("medical-data-by-type"), {"type": AnalysisType.BLOOD_BIOCHEM})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 0)
+        self.assertTrue(UserProfile.objects.filter(user=user).exists())
+
+
+class SecurityLogUserActivityTests(TestCase):
+    """Keyset-пагинация SecurityLogViewSet.user_activity"""
+
+    def setUp(self):
+        self.url = reverse("security-logs-user-activity")
+        self.user = User.objects.create_user(username="patient", password="password")
+        admin = User.objects.create_superuser(username="admin", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        for i in range(3):
+            SecurityLog.objects.create(user=self.user, action="LOGIN", details=f"login {i}")
+
+    def test_pages_follow_cursor(self):
+        response = self.client.get(self.url, {"user_id": self.user.id, "page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first_page = response.data["activities"]
+        self.assertEqual(len(first_page), 2)
+
+        cursor = response.data["next"]
+        self.assertIsInstance(cursor["before_ts"], str)
+        response = self.client.get(
+            self.url,
+            {
+                "user_id": self.user.id,
+                "page_size": 2,
+                "before_ts": cursor["before_ts"],
+                "before_id": cursor["before_id"],
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        second_page = response.data["activities"]
+        self.assertEqual(len(second_page), 1)
+        self.assertIsNone(response.data["next"])
+
+        ids = [row["id"] for row in first_page + second_page]
+        self.assertEqual(sorted(ids, reverse=True), ids)
+        self.assertEqual(set(ids), set(SecurityLog.objects.values_list("id", flat=True)))
+
+    def test_bad_before_id(self):
+        response = self.client.get(
+            self.url, {"user_id": self.user.id, "before_ts": "2025-01-15T12:00:00+00:00", "before_id": "abc"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bad_before_ts(self):
+        response = self.client.get(self.url, {"user_id": self.user.id, "before_ts": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_default_request_uses_same_envelope(self):
+        response = self.client.get(self.url, {"user_id": self.user.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data.keys(), {"user_id", "activity_count", "activities", "next"})
+        self.assertEqual(response.data["activity_count"], 3)
+        self.assertIsNone(response.data["next"])
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.url, {"user_id": self.user.id})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class DataRetentionTests(TestCase):
+    """Очистка просроченных сессий и их временных файлов"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="patient", password="password")
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+
+    def _session(self, name, started_minutes_ago, processing_status=Status.PROCESSING):
+        path = self.temp_dir / name
+        path.write_bytes(b"%PDF-1.4")
+        return AnalysisSession.objects.create(
+            user=self.user,
+            original_filename=name,
+            temp_file_path=str(path),
+            processing_status=processing_status,
+            processing_started=timezone.now() - timedelta(minutes=started_minutes_ago),
+        )
+
+    def test_cleanup_expired_sessions(self):
+        expired = [self._session(f"expired_{i}.pdf", started_minutes_ago=10) for i in range(3)]
+        fresh = self._session("fresh.pdf", started_minutes_ago=1)
+
+        with (
+            CaptureQueriesContext(connection) as queries,
+            self.assertLogs("medical_analysis.file_processor", "INFO") as logs,
+        ):
+            DataRetentionManager.cleanup_expired_sessions()
+
+        self.assertEqual(list(AnalysisSession.objects.values_list("pk", flat=True)), [fresh.pk])
+        self.assertFalse(any(Path(session.temp_file_path).exists() for session in expired))
+        self.assertEqual(SecurityLog.objects.filter(user=self.user, action="FILE_CLEANUP").count(), 3)
+        # Записи лога - одним INSERT, а не запросом на каждую сессию
+        log_insert = f'INSERT INTO "{SecurityLog._meta.db_table}"'
+        log_inserts = [query for query in queries.captured_queries if query["sql"].startswith(log_insert)]
+        self.assertEqual(len(log_inserts), 1)
+        # Счётчик считается до удаления, а не по уже пустому queryset
+        self.assertIn("удалено 3 просроченных, 0 ошибочных", logs.output[-1])
+
+    def test_verify_file_deletion(self):
+        stale = self._session("stale.pdf", started_minutes_ago=90, processing_status=Status.COMPLETED)
+        AnalysisSession.objects.filter(pk=stale.pk).update(upload_timestamp=timezone.now() - timedelta(hours=1))
+        missing = self._session("missing.pdf", started_minutes_ago=90, processing_status=Status.COMPLETED)
+        Path(missing.temp_file_path).unlink()
+
+        DataRetentionManager.verify_file_deletion()
+
+        self.assertFalse(Path(stale.temp_file_path).exists())
+        for session in (stale, missing):
+            session.refresh_from_db()
+            self.assertEqual(session.temp_file_path, "")
+            self.assertIsNotNone(session.file_deleted_timestamp)
+        self.assertEqual(SecurityLog.objects.filter(user=self.user, action="FORCE_FILE_DELETION").count(), 1)
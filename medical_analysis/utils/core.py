@@ -4,7 +4,7 @@ from typing import Tuple, Optional
 
 import requests
 logger = logging.getLogger(__name__)
-from medical_analysis.constants import UNITS_DICT
+from medical_analysis.constants import UNITS_EN, UNITS_RU
 
 
 def get_client_ip(request):
@@ -16,7 +16,7 @@ def get_client_ip(request):
 
 def get_all_units_list():
     """Получить список всех единиц измерения для autocomplete"""
-    return [{"en": unit["en"], "ru": unit["ru"]} for unit in UNITS_DICT.values()]
+    return [{"en": UNITS_EN[unit_key], "ru": UNITS_RU[unit_key]} for unit_key in UNITS_EN]
 
 def parse_value_with_operator(value_str: str) -> Tuple[Optional[float], Optional[str]]:
     """
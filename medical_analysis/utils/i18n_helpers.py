@@ -30,15 +30,15 @@ def get_parameter_display_name(param_key: str, unit: str = None) -> str:
     # get base name based on language
     if current_lang == "ru":
         # russian - use names_ru
-        base_name = param.get("names_ru", [param_key])[0]
+        base_name = param.names_ru[0]
     else:
         # english or other - use name_key
-        name_key = param.get("name_key", param_key)
+        name_key = param.name_key
         # capitalize first letter for english
         base_name = name_key.title() if name_key else param_key
 
     # add suffix if unit matches display_suffix
-    display_suffix = param.get("display_suffix")
+    display_suffix = param.display_suffix
     if display_suffix and unit and unit.strip() == display_suffix.strip():
         # remove suffix from base_name if it's already there
         if display_suffix in base_name:
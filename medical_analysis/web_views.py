@@ -13,8 +13,8 @@ from datetime import timedelta
 import logging
 
 from medical_mvp.settings import RECAPTCHA_SECRET_KEY, RECAPTCHA_PUBLIC_KEY
-from .constants import PARAMETER_TYPE_MAP
-from .enums import Status, AnalysisType, SubcriptionType
+from .constants import PARAMETER_TYPE_MAP, PARAMS_BY_TYPE
+from .enums import Status, StatusValue, AnalysisType, SubcriptionType
 from .models import AnalysisSession, MedicalData, UserProfile, SecurityLog
 from .serializers import UserRegistrationSerializer, UserLoginSerializer
 from .file_processor import FileUploadHandler
@@ -209,7 +209,7 @@ def analysis_sessions(request):
     page_obj = paginator.get_page(page_number)
 
     # Обработка choices с переводом
-    status_choices = [(choice[0], get_analysis_type_display(choice[0])) for choice in Status.choices]
+    status_choices = [(choice[0], get_analysis_type_display(choice[0])) for choice in Status.frozen_choices()]
 
     context = {
         "page_obj": page_obj,
@@ -253,7 +253,7 @@ def analysis_results(request):
     page_obj = paginator.get_page(page_number)
 
     # Обработка choices с переводом
-    analysis_types = [(choice[0], get_analysis_type_display(choice[0])) for choice in AnalysisType.choices]
+    analysis_types = [(choice[0], get_analysis_type_display(choice[0])) for choice in AnalysisType.frozen_choices()]
 
     context = {
         "page_obj": page_obj,
@@ -484,8 +484,8 @@ def compare_analyses(request):
                 analysis1 = MedicalData.objects.get(id=analysis1_id, user=request.user)
                 analysis2 = MedicalData.objects.get(id=analysis2_id, user=request.user)
 
-                data1 = analysis1.decrypt_data()
-                data2 = analysis2.decrypt_data()
+                data1 = analysis1.decrypt_data(include_raw=False)
+                data2 = analysis2.decrypt_data(include_raw=False)
 
                 if data1 and data2:
                     comparison = calculate_differences(data1.get("parsed_data", {}), data2.get("parsed_data", {}))
@@ -516,7 +516,7 @@ def compare_analyses(request):
 @login_required
 def profile_settings(request):
     """Настройки профиля"""
-    profile, created = UserProfile.objects.get_or_create(user=request.user)
+    profile = UserProfile.for_user(request.user)
 
     if request.method == "POST":
         # Обновление языка
@@ -647,7 +647,7 @@ def export_data(request):
     if format_type == "json":
         data = []
         for item in medical_data:
-            decrypted = item.decrypt_data()
+            decrypted = item.decrypt_data(include_raw=False)
             if decrypted:
                 data.append(
                     {
@@ -681,7 +681,7 @@ def analysis_trends(request):
     available_types = MedicalData.objects.filter(user=request.user).values_list("analysis_type", flat=True).distinct()
 
     # Обработка choices с переводом
-    analysis_types = [(choice[0], get_analysis_type_display(choice[0])) for choice in AnalysisType.choices]
+    analysis_types = [(choice[0], get_analysis_type_display(choice[0])) for choice in AnalysisType.frozen_choices()]
 
     # Создаём словарь типов для JS
     analysis_type_names = {choice[0]: choice[1] for choice in analysis_types}
@@ -722,7 +722,7 @@ def trends_data(request, analysis_type=None):
     )
 
     for analysis in analyses:
-        decrypted = analysis.decrypt_data()
+        decrypted = analysis.decrypt_data(include_raw=False)
         if not decrypted:
             continue
 
@@ -747,12 +747,12 @@ def trends_data(request, analysis_type=None):
 
             # Если указан фильтр по типу - фильтруем
             if analysis_type and analysis_type != "all":
-                filtered_data = {}
-                for param_key, param_data in parsed_data.items():
-                    param_real_type = PARAMETER_TYPE_MAP.get(param_key.lower())
-                    if param_real_type == analysis_type:
-                        filtered_data[param_key] = param_data
-                parsed_data = filtered_data
+                type_params = PARAMS_BY_TYPE.get(analysis_type, frozenset())
+                parsed_data = {
+                    param_key: param_data
+                    for param_key, param_data in parsed_data.items()
+                    if param_key.lower() in type_params
+                }
 
         # Обрабатываем параметры
         for param_key, param_data in parsed_data.items():
@@ -873,7 +873,7 @@ def check_session_status(request, session_id):
     # elif session.processing_status == Status.ERROR:
     #     response_data["error_message"] = session.error_message
 
-    if session.processing_status == Status.COMPLETED:
+    if session.processing_status == StatusValue.COMPLETED:
         if hasattr(session, 'medical_data'):
             response_data["analysis_id"] = session.medical_data.id
 
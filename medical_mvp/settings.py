@@ -165,7 +165,9 @@ MEDIA_ROOT = BASE_DIR / "media"
 TEMP_UPLOAD_DIR = BASE_DIR / "temp_uploads"
 
 # File upload settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_UPLOAD_FILE_SIZE = 10 * 1024 * 1024  # 10MB, лимит размера загружаемого файла
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB, файлы крупнее пишутся во временный файл, а не в память
+UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024  # 1MB, буфер copyfileobj при записи загруженного из памяти файла на диск
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 ALLOWED_FILE_EXTENSIONS = [".pdf", ".jpg", ".jpeg", ".png", ".tiff"]
 
@@ -177,6 +179,8 @@ MAX_PROCESSING_TIME = 300  # 5 минут максимум на обработк
 # OCR Settings
 TESSERACT_CMD = config("TESSERACT_CMD", default="/usr/bin/tesseract")  # Путь к tesseract
 OCR_LANGUAGES = ["rus", "eng"]
+# Сколько страниц PDF подготавливаются к OCR параллельно
+OCR_CONCURRENCY = config("OCR_CONCURRENCY", default=os.cpu_count() or 1, cast=int)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -310,6 +314,9 @@ CELERY_TASK_PUBLISH_RETRY = True
 CELERY_DISABLE_RATE_LIMITS = False
 CELERY_TIMEZONE = "Europe/Moscow"
 CELERY_IGNORE_RESULT = True
+# Дочерний процесс загружает модели OCR в worker_process_init (см. apps.py);
+# значение по умолчанию (4 с) на это не рассчитано
+CELERY_WORKER_PROC_ALIVE_TIMEOUT = 120
 
 # GPT
 OPENAI_API_KEY = config("OPENAI_API_KEY", default="")